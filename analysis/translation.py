@@ -0,0 +1,268 @@
+import os
+import re
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import functools
+import numpy as np
+import pandas as pd
+from rapidfuzz import process
+from rapidfuzz.distance import Levenshtein
+from dotenv import load_dotenv
+
+load_dotenv()
+sys.path.append(f"{os.getenv('PATH_TO_PROJECT')}/korean")
+from utils.cache import get_cache
+from utils.translate import default_providers
+
+logging.basicConfig(level=logging.INFO)
+
+NOTES_PATH = "data/notes.csv"
+SIMILARITY_THRESHOLD = 0.8
+# Rows of the candidate x reference matrix scored per cdist call.
+CHUNK_SIZE = 1024
+
+GLOSS_SEPARATORS = re.compile(r"[;,/]|\b\d+\.\s*")
+PARENTHESES = re.compile(r"\([^)]*\)")
+
+
+def clean_text(text: str) -> str:
+    special_characters = ["\xa0", "\n", " n"]
+    for character in special_characters:
+        text = text.replace(character, "")
+    return text.strip().lower()
+
+
+def exact_match(predicted: str, reference: str) -> bool:
+    return predicted == reference
+
+
+def levenshtein_similarity(predicted: str, reference: str) -> float:
+    return Levenshtein.normalized_similarity(predicted, reference)
+
+
+def split_glosses(text) -> list[str]:
+    """Split "1. to be (in a place); to exist" into ["be", "exist"]."""
+    if not isinstance(text, str):
+        return []
+    glosses = []
+    for gloss in GLOSS_SEPARATORS.split(PARENTHESES.sub("", text)):
+        gloss = clean_text(gloss)
+        gloss = gloss[3:] if gloss.startswith("to ") else gloss
+        if gloss:
+            glosses.append(gloss)
+    return glosses
+
+
+def load_references(path=NOTES_PATH, limit=None) -> dict[str, set[str]]:
+    """Map each word of the notes to its English glosses (trans_word, alt_def)."""
+    notes = pd.read_csv(path, usecols=["word", "trans_word", "alt_def"])
+    references = {}
+    for word, trans_word, alt_def in notes.itertuples(index=False):
+        glosses = references.setdefault(word, set())
+        glosses.update(split_glosses(trans_word))
+        glosses.update(split_glosses(alt_def))
+    references = {word: glosses for word, glosses in references.items() if glosses}
+    if limit is not None:
+        references = dict(list(references.items())[:limit])
+    return references
+
+
+@functools.cache
+def _wordnet():
+    try:
+        from nltk.corpus import wordnet
+
+        wordnet.ensure_loaded()
+        return wordnet
+    except (ImportError, LookupError):
+        logging.warning(
+            "WordNet is unavailable, synonym matching is disabled "
+            "(pip install nltk, then nltk.download('wordnet'))."
+        )
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def synonyms(word: str) -> frozenset[str]:
+    """Lemmas sharing a WordNet synset with ``word``, ``word`` included."""
+    wordnet = _wordnet()
+    if wordnet is None:
+        return frozenset((word,))
+    lemmas = {word}
+    for synset in wordnet.synsets(word.replace(" ", "_")):
+        lemmas.update(name.replace("_", " ").lower() for name in synset.lemma_names())
+    return frozenset(lemmas)
+
+
+async def _collect(provider, words, src, dest):
+    async def lookup(word):
+        start = time.perf_counter()
+        candidates = await provider.translate(word, src, dest)
+        return word, candidates, time.perf_counter() - start
+
+    async with provider:
+        return await asyncio.gather(*(lookup(word) for word in words))
+
+
+async def collect_candidates(words, providers=None, src="ko", dest="en"):
+    """Translate ``words`` with every provider, concurrently.
+
+    Returns {provider_name: [(word, candidates, latency), ...]}; cached
+    answers come back with a near-zero latency.
+    """
+    providers = providers if providers is not None else default_providers()
+    results = await asyncio.gather(
+        *(_collect(provider, words, src, dest) for provider in providers)
+    )
+    return {provider.name: result for provider, result in zip(providers, results)}
+
+
+def best_similarities(pairs, candidates, references):
+    """Best Levenshtein similarity of each pair group.
+
+    ``pairs`` is an array of (group, candidate index, reference index) rows.
+    The unique candidate x reference matrix is scored with rapidfuzz cdist,
+    CHUNK_SIZE rows at a time, and each group keeps its maximum.
+    """
+    groups, rows, columns = pairs.T
+    scores = np.zeros(len(pairs), dtype=np.float32)
+    order = np.argsort(rows, kind="stable")
+    bounds = np.searchsorted(rows[order], np.arange(0, len(candidates), CHUNK_SIZE))
+    bounds = np.append(bounds, len(pairs))
+    for chunk, start in enumerate(range(0, len(candidates), CHUNK_SIZE)):
+        selected = order[bounds[chunk] : bounds[chunk + 1]]
+        if len(selected) == 0:
+            continue
+        matrix = process.cdist(
+            candidates[start : start + CHUNK_SIZE],
+            references,
+            scorer=Levenshtein.normalized_similarity,
+            dtype=np.float32,
+            workers=-1,
+        )
+        scores[selected] = matrix[rows[selected] - start, columns[selected]]
+
+    best = np.zeros(groups.max() + 1 if len(groups) else 0, dtype=np.float32)
+    np.maximum.at(best, groups, scores)
+    return best
+
+
+def score(candidates, references, threshold=SIMILARITY_THRESHOLD):
+    """Score every provider against the references.
+
+    ``candidates`` is the output of ``collect_candidates`` and
+    ``references`` the output of ``load_references``. Returns one row per
+    provider and one per (provider, word).
+    """
+    candidate_index = {}
+    reference_index = {}
+    groups = []
+    pairs = []
+    for name, results in candidates.items():
+        for word, translations, latency in results:
+            group = len(groups)
+            glosses = sorted(
+                {gloss for text in translations or () for gloss in split_glosses(text)}
+            )
+            groups.append((name, word, latency, glosses))
+            for gloss in glosses:
+                row = candidate_index.setdefault(gloss, len(candidate_index))
+                for reference in references[word]:
+                    column = reference_index.setdefault(
+                        reference, len(reference_index)
+                    )
+                    pairs.append((group, row, column))
+
+    pairs = np.array(pairs, dtype=np.int64).reshape(-1, 3)
+    best = best_similarities(pairs, list(candidate_index), list(reference_index))
+    best = np.pad(best, (0, len(groups) - len(best)))
+
+    details = []
+    for (name, word, latency, glosses), similarity in zip(groups, best):
+        glosses = set(glosses)
+        expected = references[word]
+        details.append(
+            {
+                "provider": name,
+                "word": word,
+                "answered": bool(glosses),
+                "exact": bool(glosses & expected),
+                "similarity": float(similarity),
+                "fuzzy": bool(similarity >= threshold),
+                "synonym": any(synonyms(gloss) & expected for gloss in glosses),
+                "latency_ms": latency * 1000,
+            }
+        )
+    details = pd.DataFrame(details)
+
+    summary = details.groupby("provider", sort=False).agg(
+        words=("word", "size"),
+        coverage=("answered", "mean"),
+        exact=("exact", "mean"),
+        fuzzy=("fuzzy", "mean"),
+        synonym=("synonym", "mean"),
+        similarity=("similarity", "mean"),
+        latency_ms=("latency_ms", "mean"),
+        p95_latency_ms=("latency_ms", lambda latency: latency.quantile(0.95)),
+    )
+    summary = summary.sort_values(["exact", "synonym", "fuzzy"], ascending=False)
+    return summary, details
+
+
+def evaluate(
+    path=NOTES_PATH,
+    limit=None,
+    providers=None,
+    src="ko",
+    dest="en",
+    threshold=SIMILARITY_THRESHOLD,
+):
+    references = load_references(path, limit)
+    logging.info(f"Evaluating {len(references)} words from {path}.")
+    start = time.perf_counter()
+    candidates = asyncio.run(collect_candidates(list(references), providers, src, dest))
+    logging.info(f"Collected translations in {time.perf_counter() - start:.2f}s.")
+    start = time.perf_counter()
+    summary, details = score(candidates, references, threshold)
+    logging.info(f"Scored translations in {time.perf_counter() - start:.2f}s.")
+    return summary, details
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Score every translation provider against the notes."
+    )
+    parser.add_argument("--notes", default=NOTES_PATH)
+    parser.add_argument("--limit", type=int, help="only evaluate the first N words")
+    parser.add_argument(
+        "--providers", nargs="+", help="provider names (default: all of them)"
+    )
+    parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD)
+    parser.add_argument(
+        "--offline", action="store_true", help="only use cached translations"
+    )
+    parser.add_argument("--details", help="write the per-word scores to this csv")
+    args = parser.parse_args(argv)
+
+    if args.offline:
+        get_cache().offline = True
+    providers = default_providers()
+    if args.providers:
+        providers = [
+            provider for provider in providers if provider.name in args.providers
+        ]
+
+    summary, details = evaluate(
+        args.notes, args.limit, providers, threshold=args.threshold
+    )
+    print(summary.to_string(float_format=lambda value: f"{value:.3f}"))
+    if args.details:
+        details.to_csv(args.details, index=False)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
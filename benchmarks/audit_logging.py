@@ -0,0 +1,103 @@
+"""Note insert and review throughput, and size of logs, per audit log mode.
+
+Run from the project root: python -m benchmarks.audit_logging
+"""
+
+import os
+import time
+import random
+import logging
+import tempfile
+
+from database.sqlite import (
+    add_models,
+    bulk_insert_notes,
+    compact_logs,
+    create_db,
+    create_tables,
+    create_triggers,
+    set_log_mode,
+)
+
+NOTES = 50_000
+# Reviews only touch cards, edits rewrite one field of a note.
+REVIEWS = 50_000
+EDITS = 5_000
+
+
+def random_note(rng, syllables, index):
+    word = "".join(rng.choice(syllables) for _ in range(3)) + str(index)
+    return {
+        "word": word,
+        "trans_word": f"translation {index}",
+        "example": " ".join([word + "을"] * 6),
+        "definition": "a fairly long definition of the word, " * 4,
+    }
+
+
+def logs_size(connection):
+    (size,) = connection.execute(
+        "SELECT SUM(pgsize) FROM dbstat WHERE name IN ('logs', 'idx_logs_target')"
+    ).fetchone()
+    return (size or 0) / 1024 / 1024
+
+
+def run(path, mode):
+    rng = random.Random(0)
+    syllables = [chr(code) for code in range(0xAC00, 0xD7A4, 7)]
+    connection = create_db(path)
+    create_tables(connection)
+    create_triggers(connection)
+    add_models(connection)
+    connection.commit()
+    set_log_mode(connection, "off" if mode == "suspended" else mode)
+
+    start = time.perf_counter()
+    bulk_insert_notes(
+        connection,
+        (random_note(rng, syllables, index) for index in range(NOTES)),
+        batch_size=5_000,
+        log=mode != "suspended",
+    )
+    inserts = NOTES / (time.perf_counter() - start)
+
+    ids = [note_id for (note_id,) in connection.execute("SELECT id FROM notes")]
+    with connection:
+        connection.executemany(
+            "INSERT INTO cards (note_id, mod, type, flags, ords, reps) VALUES (?, 0, 0, 0, 0, 0)",
+            ((note_id,) for note_id in ids),
+        )
+
+    start = time.perf_counter()
+    with connection:
+        connection.executemany(
+            "UPDATE cards SET reps = reps + 1, mod = ? WHERE id = ?",
+            ((index, rng.randint(1, NOTES)) for index in range(REVIEWS)),
+        )
+        connection.executemany(
+            "UPDATE notes SET flds = replace(flds, 'translation', 'meaning'), mod = ? WHERE id = ?",
+            ((index, rng.choice(ids)) for index in range(EDITS)),
+        )
+    updates = (REVIEWS + EDITS) / (time.perf_counter() - start)
+
+    size = logs_size(connection)
+    start = time.perf_counter()
+    compact_logs(connection, keep_edits=1)
+    compaction = time.perf_counter() - start
+    print(
+        f"{mode:>9}: {inserts:9.0f} inserts/s {updates:9.0f} updates/s "
+        f"logs {size:6.2f} MB, {logs_size(connection):6.2f} MB compacted "
+        f"in {compaction:.2f}s"
+    )
+    connection.close()
+
+
+def main():
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ("full", "compact", "off", "suspended"):
+            run(os.path.join(directory, f"{mode}.sqlite3"), mode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Refresh time of the desklet at 100k notes, ORDER BY random() vs CardSampler.
+
+Run from the project root: python -m benchmarks.desklet_sampler
+"""
+
+import os
+import time
+import logging
+import tempfile
+
+from database.sqlite import add_models, bulk_insert_notes, create_db, create_tables
+from desklet.script_flashcards_desklet import CardSampler
+
+NOTES = 100_000
+ROUNDS = 200
+
+# Previous desklet query kept as the baseline.
+RANDOM_QUERY = "SELECT tags, flds, sfld, qfmt, afmt from notes, model_templates, models WHERE notes.model_id = models.id AND models.id = model_templates.model_id AND model_templates.id = 1 ORDER BY random() LIMIT 10;"
+
+
+def build(path):
+    connection = create_db(path)
+    create_tables(connection)
+    add_models(connection)
+    connection.commit()
+    bulk_insert_notes(
+        connection,
+        (
+            {
+                "word": f"단어{i}",
+                "trans_word": f"word {i}",
+                "example": f"예문 {i}",
+                "definition": f"definition {i}",
+            }
+            for i in range(NOTES)
+        ),
+        batch_size=10_000,
+    )
+    return connection
+
+
+def run(name, sample):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        rows = sample()
+    duration = (time.perf_counter() - start) / ROUNDS * 1000
+    print(f"{name:>22}: {duration:8.3f} ms/refresh")
+    return rows
+
+
+def main():
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        connection = build(os.path.join(directory, "notes.sqlite3"))
+
+        before = run(
+            "ORDER BY random()", lambda: connection.execute(RANDOM_QUERY).fetchall()
+        )
+
+        def cold():
+            return CardSampler(connection).sample()
+
+        cold_rows = run("CardSampler (cold)", cold)
+        sampler = CardSampler(connection)
+        after = run("CardSampler (warm)", sampler.sample)
+
+        for rows in (cold_rows, after):
+            assert len(rows) == len(before) == 10
+            assert len({row[2] for row in rows}) == 10
+            assert {row[3:] for row in rows} == {before[0][3:]}
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Condition checks per second for the negation rules, eval vs compiled.
+
+Run from the project root: python -m benchmarks.grammar_conditions
+"""
+
+import time
+
+from utils.grammar import compile_condition, get_resources
+
+WORDS = ["않", "못하", "말", "가", "먹", "하", "있", "없"] * 1_000
+
+
+def evaluate_conditions_eval(word, role, type, matches):
+    # Previous eval-based implementation kept as the baseline.
+    if role == "negation":
+        condition_template = f"'{word + '다'}'%'match'"
+    else:
+        condition_template = f"'{word}'%'match'"
+    if type == "=":
+        condition_template = condition_template.replace("%", "==")
+    elif type == "end":
+        condition_template = condition_template.replace("%", ".endswith(") + ")"
+
+    for match in matches:
+        condition = condition_template.replace("match", match)
+        if eval(condition):
+            return True
+    return False
+
+
+def run(name, check):
+    start = time.perf_counter()
+    results = [check(word) for word in WORDS]
+    duration = time.perf_counter() - start
+    print(f"{name:>8}: {len(WORDS) / duration:12.0f} checks/sec")
+    return results
+
+
+def main():
+    for rule in get_resources().rules:
+        if rule["role"] != "negation":
+            continue
+        conditions = rule["conditions"]
+        role, type, matches = rule["role"], conditions["type"], conditions["matches"]
+        predicate = compile_condition(role, type, tuple(matches))
+
+        print(f"{role} ({type} {matches})")
+        before = run(
+            "eval", lambda word: evaluate_conditions_eval(word, role, type, matches)
+        )
+        after = run("compiled", predicate)
+        assert before == after, "compiled condition differs from eval"
+        assert predicate("'") is False
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Sentences per second of syntactic_grouping over the data/cleaned corpus.
+
+Run from the project root: python -m benchmarks.grammar_grouping
+
+Sentences are tagged with Mecab when konlpy is installed, otherwise with a
+naive eojeol splitter that is only meant to produce realistic POS sequences.
+"""
+
+import glob
+import time
+
+from utils.grammar import (
+    CompiledRules,
+    evaluate_conditions,
+    get_resources,
+    syntactic_grouping,
+)
+
+SUFFIX_TAGS = [
+    ("에서", "JKB"),
+    ("으로", "JKB"),
+    ("까요", "EF"),
+    ("이", "JKS"),
+    ("가", "JKS"),
+    ("은", "JX"),
+    ("는", "JX"),
+    ("을", "JKO"),
+    ("를", "JKO"),
+    ("에", "JKB"),
+    ("로", "JKB"),
+    ("의", "JKG"),
+    ("도", "JX"),
+    ("와", "JC"),
+    ("과", "JC"),
+    ("다", "EF"),
+    ("고", "EC"),
+    ("지", "EC"),
+]
+
+
+def naive_pos(sentence: str) -> list[tuple[str, str]]:
+    tokens = []
+    for eojeol in sentence.split():
+        for suffix, tag in SUFFIX_TAGS:
+            if len(eojeol) > len(suffix) and eojeol.endswith(suffix):
+                stem_tag = "VV" if tag.startswith("E") else "NNG"
+                tokens.append((eojeol[: -len(suffix)], stem_tag))
+                tokens.append((suffix, tag))
+                break
+        else:
+            tokens.append((eojeol, "NNG"))
+    return tokens
+
+
+def load_corpus(pattern: str = "data/cleaned/*.txt_cleaned.txt") -> list[str]:
+    sentences = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, "r", encoding="utf-8") as f:
+            sentences.extend(line.rstrip("\n") for line in f if line.strip())
+    return sentences
+
+
+def syntactic_grouping_scan(tokens, rules):
+    # Sliding-window implementation kept as the baseline.
+    syntactic_groups = []
+    sorted_rules = sorted(rules, key=lambda r: r["priority"])
+    used_indices = set()
+
+    for rule in sorted_rules:
+        conditions = rule.get("conditions")
+        for pattern in rule["patterns"]:
+            window_size = len(pattern)
+            for i in range(len(tokens) - window_size + 1):
+                if any((i + j) in used_indices for j in range(window_size)):
+                    continue
+                token_window = tokens[i : i + window_size]
+                pos_sequence = [pos for _, pos in token_window]
+
+                if pos_sequence == pattern:
+                    if not conditions or any(
+                        pos in conditions["on"]
+                        and evaluate_conditions(
+                            token_window[index][0],
+                            rule["role"],
+                            conditions["type"],
+                            conditions["matches"],
+                        )
+                        for index, pos in enumerate(pos_sequence)
+                    ):
+                        syntactic_groups.append(
+                            {
+                                "span": token_window,
+                                "role": rule["role"],
+                                "description": rule["description"],
+                                "priority": rule["priority"],
+                            }
+                        )
+                    used_indices.update(range(i, i + window_size))
+                    break
+    return syntactic_groups
+
+
+def run(name, grouping, tagged, grammar_rules):
+    start = time.perf_counter()
+    results = [grouping(tokens, grammar_rules) for tokens in tagged]
+    duration = time.perf_counter() - start
+    print(f"{name:>10}: {len(tagged) / duration:10.1f} sentences/sec ({duration:.2f}s)")
+    return results
+
+
+def main():
+    try:
+        from konlpy.tag import Mecab
+
+        tag = Mecab().pos
+    except Exception:
+        tag = naive_pos
+
+    sentences = load_corpus()
+    tagged = [tag(sentence) for sentence in sentences]
+    print(f"{len(tagged)} sentences, {sum(map(len, tagged))} tokens")
+
+    rules = get_resources().rules
+    before = run("scan", syntactic_grouping_scan, tagged, rules)
+    after = run("trie", syntactic_grouping, tagged, CompiledRules(rules))
+    assert before == after, "trie grouping differs from the sliding-window scan"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Import time of utils.grammar and the files it opens while importing.
+
+Run from any directory: python -m benchmarks.grammar_import
+
+Each measurement runs in a fresh interpreter with an audit hook recording
+every ``open`` event, so importing the module must not touch data/grammar.
+"""
+
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import sys, time
+opened = []
+sys.addaudithook(lambda event, args: event == "open" and opened.append(str(args[0])))
+start = time.perf_counter()
+import utils.grammar as grammar
+import_time = time.perf_counter() - start
+import_opens = [path for path in opened if path.endswith(".json")]
+start = time.perf_counter()
+grammar.get_resources().preload()
+load_time = time.perf_counter() - start
+load_opens = [path for path in opened if path.endswith(".json")][len(import_opens):]
+print(import_time, len(import_opens), load_time, len(load_opens))
+"""
+
+
+def main(runs: int = 10):
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    import_times, load_times = [], []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.expanduser("~"),
+            env=env,
+        ).stdout.split()
+        import_time, import_opens, load_time, load_opens = output
+        assert int(import_opens) == 0, "importing utils.grammar opened JSON files"
+        import_times.append(float(import_time))
+        load_times.append(float(load_time))
+
+    print(f"import utils.grammar: {min(import_times) * 1000:.2f} ms, 0 files opened")
+    print(
+        f"first preload():      {min(load_times) * 1000:.2f} ms, {load_opens} files opened"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Search latency over 100k random notes, LIKE scan vs the notes_fts index.
+
+Run from the project root: python -m benchmarks.notes_search
+"""
+
+import os
+import time
+import random
+import logging
+import tempfile
+
+from database.sqlite import (
+    add_models,
+    bulk_insert_notes,
+    create_db,
+    create_search,
+    create_tables,
+    search_notes,
+)
+
+NOTES = 100_000
+ROUNDS = 20
+
+# Substring scan over the raw fields kept as the baseline.
+LIKE_QUERY = "SELECT id, flds FROM notes WHERE flds LIKE ? LIMIT 20"
+
+
+def random_words(rng, count, alphabet, lengths):
+    return [
+        "".join(rng.choice(alphabet) for _ in range(rng.choice(lengths)))
+        for _ in range(count)
+    ]
+
+
+def build(path):
+    """A notes table with 100k random words, translations and examples."""
+    rng = random.Random(0)
+    syllables = [chr(code) for code in range(0xAC00, 0xD7A4, 7)]
+    words = random_words(rng, NOTES, syllables, (2, 3, 4))
+    english = random_words(rng, 5_000, "abcdefghijklmnopqrstuvwxyz", range(3, 10))
+    eojeols = random_words(rng, 20_000, syllables, (1, 2, 3))
+
+    connection = create_db(path)
+    create_tables(connection)
+    create_search(connection)
+    add_models(connection)
+    connection.commit()
+    bulk_insert_notes(
+        connection,
+        (
+            {
+                "word": word,
+                "trans_word": "; ".join(rng.sample(english, 2)),
+                "example": " ".join([word + "을"] + rng.sample(eojeols, 6)),
+                "definition": " ".join(rng.sample(english, 8)),
+            }
+            for word in words
+        ),
+        batch_size=10_000,
+    )
+    queries = [(word, "word") for word in rng.sample(words, 20)]
+    queries += [(word[:1], None) for word in rng.sample(words, 20)]
+    queries += [(word[:3], "translation") for word in rng.sample(english, 20)]
+    return connection, queries
+
+
+def run(name, search, queries):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for query, field in queries:
+            search(query, field)
+    duration = (time.perf_counter() - start) / (ROUNDS * len(queries)) * 1000
+    print(f"{name:>6}: {duration:8.3f} ms/query")
+
+
+def main():
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        connection, queries = build(os.path.join(directory, "notes.sqlite3"))
+        run(
+            "LIKE",
+            lambda query, field: connection.execute(
+                LIKE_QUERY, (f"%{query}%",)
+            ).fetchall(),
+            queries,
+        )
+        run(
+            "FTS5",
+            lambda query, field: search_notes(connection, query, field),
+            queries,
+        )
+
+        for query, field in queries[:20]:
+            assert search_notes(connection, query, field)[0][1] == query
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
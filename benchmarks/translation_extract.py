@@ -0,0 +1,126 @@
+"""Parse time per page of every provider, BeautifulSoup vs targeted lxml.
+
+Pages are read from benchmarks/fixtures/ (trimmed copies of each provider's
+layout with the usual head, scripts and navigation around the content).
+
+Run from the project root: python -m benchmarks.translation_extract
+"""
+
+import os
+import time
+
+import bs4
+
+from utils import extract
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+ROUNDS = 300
+
+
+# Previous BeautifulSoup implementations kept as the baseline.
+def parse_wiktionary(text):
+    soup = bs4.BeautifulSoup(text, "html.parser")
+    page_content = soup.find("div", {"class": "mw-content-ltr mw-parser-output"})
+    translations = []
+    for li in page_content.find("ol").find_all("li"):
+        dl_tag = li.find("dl")
+        if dl_tag:
+            dl_tag.extract()
+        translations.append(li.text)
+    return translations
+
+
+def parse_Glosbe(text):
+    soup = bs4.BeautifulSoup(text, "html.parser")
+    page_content = soup.find("section", {"class": "bg-white px-1"})
+    ul_translation = page_content.find("ul", {"class": "pr-1"})
+    return [li.find("h3").text for li in ul_translation.find_all("li")]
+
+
+def parse_Daum(text):
+    soup = bs4.BeautifulSoup(text, "html.parser")
+    page_content = soup.find("div", {"class": "search_cont"})
+    table_translation = page_content.find_all("div", {"class": "card_word"})[1]
+    translation = table_translation.find("div", {"class": "search_type kuke_type"})
+    return [
+        li.find("span", {"class": "txt_search"}).text
+        for li in translation.find_all("li")
+    ]
+
+
+def parse_wordreference(text):
+    soup = bs4.BeautifulSoup(text, "html.parser")
+    page_content = soup.find("td", {"id": "centercolumn"})
+    table_translation = page_content.find("table", {"class": "WRD"})
+    return [td.text for td in table_translation.find_all("td", {"class": "FrWrd"})[1:]]
+
+
+def parse_word(text, word):
+    soup = bs4.BeautifulSoup(text, "xml")
+    trans_dfn_soup = soup.find("trans_dfn")
+    definition_soup = soup.find("definition")
+    pos_soup = soup.find("pos")
+    target_code_soup = soup.find("target_code")
+    trans_word_soup = soup.find("trans_word")
+    if trans_dfn_soup is not None:
+        definition = trans_dfn_soup.get_text()
+    elif definition_soup is not None:
+        definition = definition_soup.get_text()
+    else:
+        definition = ""
+    return {
+        "word": word,
+        "definition": definition,
+        "pos": pos_soup.get_text() if pos_soup is not None else "",
+        "target_code": (
+            target_code_soup.get_text() if target_code_soup is not None else ""
+        ),
+        "trans_word": trans_word_soup.get_text() if trans_word_soup is not None else "",
+    }
+
+
+def parse_example(text):
+    example_soup = bs4.BeautifulSoup(text, "xml").find("example")
+    return example_soup.get_text() if example_soup is not None else "..."
+
+
+CASES = [
+    ("wiktionary", "wiktionary.html", parse_wiktionary, extract.parse_wiktionary),
+    ("glosbe", "glosbe.html", parse_Glosbe, extract.parse_Glosbe),
+    ("daum", "daum.html", parse_Daum, extract.parse_Daum),
+    (
+        "wordreference",
+        "wordreference.html",
+        parse_wordreference,
+        extract.parse_wordreference,
+    ),
+    (
+        "krdict.word",
+        "krdict_word.xml",
+        lambda text: parse_word(text, "사랑"),
+        lambda text: extract.parse_krdict_word(text, "사랑"),
+    ),
+    ("krdict.exam", "krdict_exam.xml", parse_example, extract.parse_krdict_example),
+]
+
+
+def run(parser, text):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = parser(text)
+    return result, (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main():
+    print(f"{'provider':>14} {'bs4 ms/page':>12} {'lxml ms/page':>13} {'speedup':>8}")
+    for name, fixture, before, after in CASES:
+        with open(os.path.join(FIXTURES, fixture), "r", encoding="utf-8") as f:
+            text = f.read()
+        expected, bs4_ms = run(before, text)
+        result, lxml_ms = run(after, text)
+        assert result == expected, f"{name}: {result!r} != {expected!r}"
+        print(f"{name:>14} {bs4_ms:12.3f} {lxml_ms:13.3f} {bs4_ms / lxml_ms:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,15 @@ import logging
 import sqlite3
 import time
 import uuid
+import asyncio
+import csv
+import contextlib
 import pandas as pd
-import random
 
 load_dotenv()
 sys.path.append(f"{os.getenv('PATH_TO_PROJECT')}/korean")
-from utils.dictionary import search_word_in_dictionary, search_example
+from utils.dictionary import DictionaryClient
+from utils.examples import PATH_TO_EXAMPLES, ExampleIndex
 
 logging.basicConfig(level=logging.INFO)
 
@@ -20,65 +23,340 @@ def create_db(path_to_db):
     return connection
 
 
+LOG_MODES = ("full", "compact", "off")
+LOG_MODE = os.getenv("LOG_MODE", "compact")
+LOG_TRIGGERS = [
+    "log_insert_note",
+    "log_update_note",
+    "log_delete_note",
+    "log_insert_card",
+    "log_update_card",
+    "log_delete_card",
+]
+# "<mode> <pid>" of a suspend_logging() in progress, see resume_logging().
+SUSPENDED_SETTING = "suspended_log_mode"
+
+
+def changed_columns(columns):
+    """JSON object of [old, new] for each of ``columns`` that changed."""
+    pairs = ", ".join(
+        f"'{column}', CASE WHEN OLD.{column} IS NOT NEW.{column} THEN json_array(OLD.{column}, NEW.{column}) END"
+        for column in columns
+    )
+    # json_patch drops the null (unchanged) members.
+    return f"json_patch('{{}}', json_object({pairs}))"
+
+
+def log_triggers(mode):
+    """CREATE TRIGGER statements of the audit triggers for one log mode.
+
+    "full" keeps whole rows (old and new flds on every edit), "compact"
+    keeps inserts to their ids and edits to the columns that changed, and
+    "off" has no trigger at all. The mode is baked into the statements so
+    that triggers never look it up.
+    """
+    if mode == "off":
+        return []
+    if mode == "full":
+        add_note = "json_object('model_id', NEW.model_id,'flds', NEW.flds,'tags', NEW.tags)"
+        edit_note = "json_object('old_flds', OLD.flds,'new_flds', NEW.flds,'old_tags', OLD.tags,'new_tags', NEW.tags)"
+        edit_card = "json_object('old_reps', OLD.reps, 'new_reps', NEW.reps, 'old_flags', OLD.flags, 'new_flags', NEW.flags)"
+        edit_note_when = edit_card_when = ""
+    else:
+        add_note = "json_object('model_id', NEW.model_id)"
+        edit_note = changed_columns(["flds", "tags"])
+        edit_card = changed_columns(["reps", "flags"])
+        edit_note_when = "WHEN OLD.flds IS NOT NEW.flds OR OLD.tags IS NOT NEW.tags "
+        edit_card_when = "WHEN OLD.reps IS NOT NEW.reps OR OLD.flags IS NOT NEW.flags "
+    return [
+        # Triggers for notes table
+        f"CREATE TRIGGER IF NOT EXISTS log_insert_note AFTER INSERT ON notes BEGIN INSERT INTO logs (action, target_type, target_id, details) VALUES ('add_note','note',NEW.id,{add_note});END;",
+        f"CREATE TRIGGER IF NOT EXISTS log_update_note AFTER UPDATE ON notes {edit_note_when}BEGIN INSERT INTO logs (action, target_type, target_id, details) VALUES ('edit_note','note',NEW.id,{edit_note});END;",
+        "CREATE TRIGGER IF NOT EXISTS log_delete_note AFTER DELETE ON notes BEGIN INSERT INTO logs (action, target_type, target_id, details) VALUES ('delete_note', 'note', OLD.id, json_object('flds', OLD.flds, 'tags', OLD.tags)); END;",
+        # Triggers for cards table
+        "CREATE TRIGGER IF NOT EXISTS log_insert_card AFTER INSERT ON cards BEGIN INSERT INTO logs (action, target_type, target_id, details) VALUES ('add_card', 'card', NEW.id, json_object('note_id', NEW.note_id, 'type', NEW.type, 'ords', NEW.ords)); END;",
+        f"CREATE TRIGGER IF NOT EXISTS log_update_card AFTER UPDATE ON cards {edit_card_when}BEGIN INSERT INTO logs (action, target_type, target_id, details) VALUES ('edit_card', 'card', NEW.id, {edit_card}); END;",
+        "CREATE TRIGGER IF NOT EXISTS log_delete_card AFTER DELETE ON cards BEGIN INSERT INTO logs (action, target_type, target_id, details) VALUES ('delete_card', 'card', OLD.id, json_object('note_id', OLD.note_id, 'type', OLD.type, 'ords', OLD.ords)); END;",
+    ]
+
+
+def install_log_triggers(connection, mode):
+    cursor = connection.cursor()
+    for name in LOG_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for statement in log_triggers(mode):
+        cursor.execute(statement)
+
+
 def create_triggers(connection):
+    """Install the audit triggers of notes and cards for the current log mode.
+
+    Existing triggers are replaced so older databases pick up the modes.
+    """
+    resume_logging(connection)
+    with connection:
+        install_log_triggers(connection, get_log_mode(connection))
+
+
+def get_setting(connection, name, default=None):
     cursor = connection.cursor()
+    cursor.execute("SELECT value FROM settings WHERE name = ?", (name,))
+    row = cursor.fetchone()
+    return row[0] if row else default
 
-    # Triggers for notes table
+
+def get_log_mode(connection):
+    return get_setting(connection, "log_mode", "full")
+
+
+def set_log_mode(connection, mode):
+    """Store ``mode`` and swap the audit triggers, in one transaction."""
+    if mode not in LOG_MODES:
+        raise ValueError(f"Unknown log mode {mode!r}, expected one of {LOG_MODES}")
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO settings (name, value) VALUES ('log_mode', ?)",
+            (mode,),
+        )
+        install_log_triggers(connection, mode)
+
+
+@contextlib.contextmanager
+def suspend_logging(connection):
+    """Turn the audit triggers off for the duration of a bulk import.
+
+    Triggers belong to the database, so other connections stop logging
+    meanwhile too. The previous mode is restored on exit; if the process
+    dies first, ``resume_logging`` restores it on the next start.
+    """
+    mode = get_log_mode(connection)
+    if mode == "off":
+        yield
+        return
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO settings (name, value) VALUES (?, ?)",
+            (SUSPENDED_SETTING, f"{mode} {os.getpid()}"),
+        )
+    set_log_mode(connection, "off")
+    try:
+        yield
+    finally:
+        set_log_mode(connection, mode)
+        with connection:
+            connection.execute(
+                "DELETE FROM settings WHERE name = ?", (SUSPENDED_SETTING,)
+            )
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def resume_logging(connection):
+    """Restore the log mode a killed ``suspend_logging`` left off.
+
+    Nothing is done while the suspending process is still running.
+    """
+    suspended = get_setting(connection, SUSPENDED_SETTING)
+    if suspended is None:
+        return
+    mode, pid = suspended.split()
+    if process_alive(int(pid)):
+        return
+    logging.warning(
+        f"Audit logging was left off by an interrupted import (pid {pid}), restoring {mode!r}."
+    )
+    set_log_mode(connection, mode)
+    with connection:
+        connection.execute("DELETE FROM settings WHERE name = ?", (SUSPENDED_SETTING,))
+
+
+def compact_logs(connection, keep_days=90, keep_edits=10, archive_path=None):
+    """Bound the size of ``logs``.
+
+    Only the last ``keep_edits`` edits of every note or card are kept, and
+    entries older than ``keep_days`` days are rotated out, into the
+    ``logs`` table of ``archive_path`` when given. Returns the number of
+    rows removed.
+    """
+    start_time = time.time()
+    cursor = connection.cursor()
+    (before,) = cursor.execute("SELECT COUNT(*) FROM logs").fetchone()
+    if archive_path is not None:
+        cursor.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+    with connection:
+        cursor.execute(
+            "DELETE FROM logs WHERE id IN (SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY target_type, target_id ORDER BY id DESC) AS position FROM logs WHERE action LIKE 'edit_%') WHERE position > ?)",
+            (keep_edits,),
+        )
+        cutoff = f"-{int(keep_days)} days"
+        if archive_path is not None:
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS archive.logs (id INTEGER PRIMARY KEY, timestamp DATETIME, action TEXT NOT NULL, target_type TEXT NOT NULL, target_id INTEGER NOT NULL, details TEXT, success BOOLEAN)"
+            )
+            cursor.execute(
+                "INSERT OR IGNORE INTO archive.logs SELECT * FROM main.logs WHERE timestamp < datetime('now', ?)",
+                (cutoff,),
+            )
+        cursor.execute(
+            "DELETE FROM main.logs WHERE timestamp < datetime('now', ?)", (cutoff,)
+        )
+    if archive_path is not None:
+        cursor.execute("DETACH DATABASE archive")
+    (after,) = cursor.execute("SELECT COUNT(*) FROM logs").fetchone()
+    # Hand the freed pages back to the file system.
+    cursor.execute("VACUUM")
+
+    duration = time.time() - start_time
+    logging.info(
+        f"Compacted logs from {before} to {after} rows in {duration:.2f}s."
+    )
+    return before - after
+
+
+def create_tables(connection):
+    cursor = connection.cursor()
     cursor.execute(
-        "CREATE TRIGGER IF NOT EXISTS log_insert_note AFTER INSERT ON notes BEGIN INSERT INTO logs (action, target_type, target_id, details) VALUES ('add_note','note',NEW.id,json_object('model_id', NEW.model_id,'flds', NEW.flds,'tags', NEW.tags));END;"
+        "CREATE TABLE IF NOT EXISTS notes (id INTEGER PRIMARY KEY,guid TEXT, model_id INTEGER, mod INTEGER, tags TEXT, \
+                                               flds TEXT,sfld TEXT, flags INTEGER, FOREIGN KEY(model_id) REFERENCES models(id))"
     )
     cursor.execute(
-        "CREATE TRIGGER IF NOT EXISTS log_update_note AFTER UPDATE ON notes BEGIN INSERT INTO logs (action, target_type, target_id, details) VALUES ('edit_note','note',NEW.id,json_object('old_flds', OLD.flds,'new_flds', NEW.flds,'old_tags', OLD.tags,'new_tags', NEW.tags));END;"
+        "CREATE TABLE IF NOT EXISTS cards (id INTEGER PRIMARY KEY, note_id INTEGER, mod INTEGER, type INTEGER, flags INTEGER, ords INTEGER, reps INTEGER, FOREIGN KEY(note_id) REFERENCES notes(id))"
     )
+
     cursor.execute(
-        "CREATE TRIGGER IF NOT EXISTS log_delete_note AFTER DELETE ON notes BEGIN INSERT INTO logs (action, target_type, target_id, details) VALUES ('delete_note', 'note', OLD.id, json_object('flds', OLD.flds, 'tags', OLD.tags)); END;"
+        "CREATE TABLE IF NOT EXISTS models (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL)"
     )
 
-    # Triggers for cards table
     cursor.execute(
-        "CREATE TRIGGER IF NOT EXISTS log_insert_card AFTER INSERT ON cards BEGIN INSERT INTO logs (action, target_type, target_id, details) VALUES ('add_card', 'card', NEW.id, json_object('note_id', NEW.note_id, 'type', NEW.type, 'ords', NEW.ords)); END;"
+        "CREATE TABLE IF NOT EXISTS model_fields (id INTEGER PRIMARY KEY, model_id INTEGER, name TEXT, ord INTEGER, FOREIGN KEY(model_id) REFERENCES models(id))"
     )
 
     cursor.execute(
-        "CREATE TRIGGER IF NOT EXISTS log_update_card AFTER UPDATE ON cards BEGIN INSERT INTO logs (action, target_type, target_id, details) VALUES ('edit_card', 'card', NEW.id, json_object('old_reps', OLD.reps, 'new_reps', NEW.reps, 'old_flags', OLD.flags, 'new_flags', NEW.flags)); END;"
+        "CREATE TABLE IF NOT EXISTS model_templates (id INTEGER PRIMARY KEY, model_id INTEGER, name TEXT, qfmt TEXT, afmt TEXT, FOREIGN KEY(model_id) REFERENCES models(id))"
     )
 
     cursor.execute(
-        "CREATE TRIGGER IF NOT EXISTS log_delete_card AFTER DELETE ON cards BEGIN INSERT INTO logs (action, target_type, target_id, details) VALUES ('delete_card', 'card', OLD.id, json_object('note_id', OLD.note_id, 'type', OLD.type, 'ords', OLD.ords)); END;"
+        "CREATE TABLE IF NOT EXISTS logs (id INTEGER PRIMARY KEY AUTOINCREMENT,  timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, action TEXT NOT NULL, target_type TEXT NOT NULL, target_id INTEGER NOT NULL, details TEXT, success BOOLEAN DEFAULT 1)"
     )
 
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+    )
+    cursor.execute(
+        "INSERT OR IGNORE INTO settings (name, value) VALUES ('log_mode', ?)",
+        (LOG_MODE,),
+    )
 
-def create_tables(connection):
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS checkpoints (name TEXT PRIMARY KEY, position INTEGER NOT NULL, done BOOLEAN DEFAULT 0, updated DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+
+    create_indexes(connection)
+
+
+def create_indexes(connection):
     cursor = connection.cursor()
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_sfld ON notes(sfld)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_model_id ON notes(model_id)")
     cursor.execute(
-        "CREATE TABLE IF NOT EXISTS notes (id INTEGER PRIMARY KEY,guid TEXT, model_id INTEGER, mod INTEGER, tags TEXT, \
-                                               flds TEXT,sfld TEXT, flags INTEGER, FOREIGN KEY(model_id) REFERENCES models(id))"
+        "CREATE INDEX IF NOT EXISTS idx_model_templates_model_id ON model_templates(model_id)"
     )
     cursor.execute(
-        "CREATE TABLE IF NOT EXISTS cards (id INTEGER PRIMARY KEY, note_id INTEGER, mod INTEGER, type INTEGER, flags INTEGER, ords INTEGER, reps INTEGER, FOREIGN KEY(note_id) REFERENCES notes(id))"
+        "CREATE INDEX IF NOT EXISTS idx_logs_target ON logs(target_type, target_id)"
     )
 
+
+NOTE_FIELDS = ["word", "translation", "example", "definition"]
+
+
+def note_field(flds, index):
+    """SQL expression for field ``index`` of a \\x1f-separated flds column."""
+    rest = f"({flds} || char(31))"
+    for _ in range(index):
+        rest = f"substr({rest}, instr({rest}, char(31)) + 1)"
+    return f"substr({rest}, 1, instr({rest}, char(31)) - 1)"
+
+
+def create_search(connection):
+    """Full-text index of the note fields, kept in sync with notes by triggers.
+
+    notes_fts is an external content FTS5 table over the notes_fields view,
+    so the text is only stored once, in notes.
+    """
+    cursor = connection.cursor()
+    fields = ", ".join(
+        f"{note_field('flds', index)} AS {name}"
+        for index, name in enumerate(NOTE_FIELDS)
+    )
     cursor.execute(
-        "CREATE TABLE IF NOT EXISTS models (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL)"
+        f"CREATE VIEW IF NOT EXISTS notes_fields AS SELECT id, {fields} FROM notes"
     )
-
     cursor.execute(
-        "CREATE TABLE IF NOT EXISTS model_fields (id INTEGER PRIMARY KEY, model_id INTEGER, name TEXT, ord INTEGER, FOREIGN KEY(model_id) REFERENCES models(id))"
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5({', '.join(NOTE_FIELDS)}, content='notes_fields', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')"
     )
 
+    columns = ", ".join(NOTE_FIELDS)
+
+    def values(row):
+        return ", ".join(
+            note_field(f"{row}.flds", index) for index in range(len(NOTE_FIELDS))
+        )
+
+    insert = f"INSERT INTO notes_fts (rowid, {columns}) VALUES (NEW.id, {values('NEW')});"
+    delete = f"INSERT INTO notes_fts (notes_fts, rowid, {columns}) VALUES ('delete', OLD.id, {values('OLD')});"
     cursor.execute(
-        "CREATE TABLE IF NOT EXISTS model_templates (id INTEGER PRIMARY KEY, model_id INTEGER, name TEXT, qfmt TEXT, afmt TEXT, FOREIGN KEY(model_id) REFERENCES models(id))"
+        f"CREATE TRIGGER IF NOT EXISTS fts_insert_note AFTER INSERT ON notes BEGIN {insert} END;"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS fts_update_note AFTER UPDATE OF flds ON notes BEGIN {delete} {insert} END;"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS fts_delete_note AFTER DELETE ON notes BEGIN {delete} END;"
     )
 
+    # Index the notes inserted before the search table existed.
+    (indexed,) = cursor.execute("SELECT COUNT(*) FROM notes_fts_docsize").fetchone()
+    if indexed == 0:
+        cursor.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')")
+
+
+def search_notes(connection, query, field=None, limit=20):
+    """Notes matching every word of ``query`` as a prefix, best match first.
+
+    ``field`` restricts the search to one of NOTE_FIELDS. Returns
+    (id, word, translation, example, definition) rows.
+    """
+    terms = " AND ".join(
+        '"' + term.replace('"', '""') + '"*' for term in query.split()
+    )
+    if not terms:
+        return []
+    if field is not None:
+        if field not in NOTE_FIELDS:
+            raise ValueError(f"Unknown field {field!r}, expected one of {NOTE_FIELDS}")
+        terms = f"{field} : ({terms})"
+    cursor = connection.cursor()
     cursor.execute(
-        "CREATE TABLE IF NOT EXISTS logs (id INTEGER PRIMARY KEY AUTOINCREMENT,  timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, action TEXT NOT NULL, target_type TEXT NOT NULL, target_id INTEGER NOT NULL, details TEXT, success BOOLEAN DEFAULT 1)"
+        f"SELECT rowid, {', '.join(NOTE_FIELDS)} FROM notes_fts WHERE notes_fts MATCH ? ORDER BY bm25(notes_fts, 4.0, 2.0, 1.0, 1.0) LIMIT ?",
+        (terms, limit),
     )
+    return cursor.fetchall()
 
 
 def add_models(connection):
     cursor = connection.cursor()
 
-    cursor.execute("INSERT INTO models (name) VALUES ('Korean Vocabulary');")
+    cursor.execute(
+        "INSERT OR IGNORE INTO models (id, name) VALUES (1, 'Korean Vocabulary');"
+    )
     cursor.execute(
         "INSERT OR IGNORE INTO model_fields (id, model_id, name, ord) VALUES (1, 1, 'Mot', 0),(2, 1, 'Traduction', 1),(3, 1, 'Exemple', 2);"
     )
@@ -87,14 +365,7 @@ def add_models(connection):
     )
 
 
-def insert_row_notes(connection, data):
-    cursor = connection.cursor()
-    cursor.execute("SELECT id FROM notes")
-    id_list = cursor.fetchall()
-    now = int(time.time())
-    note_id = int(time.time() * 1000)
-    while note_id in id_list:
-        note_id += 1
+def build_note_row(data, note_id, now):
     model_id = 1
 
     word = data["word"]
@@ -106,14 +377,57 @@ def insert_row_notes(connection, data):
     sfld = word
     guid = str(uuid.uuid4())
 
-    cursor.execute(
-        """
-    INSERT INTO notes(id, guid, model_id, mod, tags, flds, sfld, flags) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """,
-        (note_id, guid, model_id, now, "Korean Vocabulary", flds, sfld, 0),
-    )
+    return (note_id, guid, model_id, now, "Korean Vocabulary", flds, sfld, 0)
+
+
+def insert_row_notes(connection, data):
+    return bulk_insert_notes(connection, [data])
+
+
+def bulk_insert_notes(connection, rows, batch_size=500, log=True):
+    """Insert an iterable of note dicts in batches, one transaction per batch.
 
-    connection.commit()
+    Ids are allocated in memory from ``max(id) + 1`` (or the current time in
+    milliseconds, whichever is greater) so no per-row lookup is needed.
+    With ``log=False`` the audit triggers are suspended meanwhile.
+    Returns the number of inserted notes.
+    """
+    if not log:
+        with suspend_logging(connection):
+            return bulk_insert_notes(connection, rows, batch_size)
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT MAX(id) FROM notes")
+    (max_id,) = cursor.fetchone()
+    note_id = max(int(time.time() * 1000), (max_id or 0) + 1)
+
+    start_time = time.time()
+    inserted = 0
+    batch = []
+
+    def flush():
+        with connection:
+            connection.executemany(
+                "INSERT INTO notes(id, guid, model_id, mod, tags, flds, sfld, flags) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+
+    for data in rows:
+        batch.append(build_note_row(data, note_id, int(time.time())))
+        note_id += 1
+        if len(batch) >= batch_size:
+            flush()
+            inserted += len(batch)
+            batch = []
+    if batch:
+        flush()
+        inserted += len(batch)
+
+    duration = time.time() - start_time
+    logging.info(
+        f"Inserted {inserted} notes in {duration:.2f}s ({inserted / max(duration, 1e-9):.0f} rows/sec)."
+    )
+    return inserted
 
 
 def get_rows(connection, query):
@@ -123,61 +437,210 @@ def get_rows(connection, query):
     return rows
 
 
-def initialize_db(db):
+def get_checkpoint(connection, name):
+    cursor = connection.cursor()
+    cursor.execute("SELECT position, done FROM checkpoints WHERE name = ?", (name,))
+    row = cursor.fetchone()
+    if row is None:
+        return 0, False
+    return row[0], bool(row[1])
+
+
+def set_checkpoint(connection, name, position, done=False):
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO checkpoints (name, position, done, updated) VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+            (name, position, int(done)),
+        )
+
+
+NOTES_CHECKPOINT = "initialize_db"
+NOTES_CSV_FIELDS = [
+    "word",
+    "definition",
+    "pos",
+    "target_code",
+    "trans_word",
+    "alt_def",
+    "wiki_link",
+    "example",
+    "wordreference_link",
+]
+
+
+def read_vocabulary(path, start=0):
+    excel_file = pd.read_excel(path)
+    for position, row in enumerate(excel_file.to_dict("records")):
+        if position >= start:
+            yield position, row
+
+
+def enrich_note(row, data, example):
+    # A failed example request must not abort the import.
+    if example is None:
+        example = "..."
+    if data:
+        data["alt_def"] = row["English"]
+        data["wiki_link"] = row["Wiktionary Link"]
+        data["example"] = example
+    else:
+        data = {
+            "word": row["Word"],
+            "definition": "",
+            "pos": "",
+            "target_code": "",
+            "trans_word": "",
+            "alt_def": row["English"],
+            "wiki_link": row["Wiktionary Link"],
+            "wordreference_link": row["Wordreference Link"],
+            "example": example,
+        }
+    return data
+
+
+def open_notes_csv(path, append=True):
+    """Open the notes CSV for appending, reusing the header of an existing file.
+
+    With ``append=False`` the file is rewritten from scratch.
+    """
+    fieldnames = NOTES_CSV_FIELDS
+    exists = append and os.path.exists(path) and os.path.getsize(path) > 0
+    if exists:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            fieldnames = next(csv.reader(f))
+    file = open(path, "a" if append else "w", encoding="utf-8", newline="")
+    writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction="ignore")
+    if not exists:
+        writer.writeheader()
+    return file, writer
+
+
+def restore_csv_notes(db, path, known_words):
+    """Insert the notes of the CSV that are missing from ``notes``.
+
+    Chunks are written to the CSV before they are committed, so after a
+    crash in between, the CSV holds rows the table does not. Returns the
+    restored words.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        missing = {
+            row["word"]: row
+            for row in csv.DictReader(f)
+            if row["word"] not in known_words
+        }
+    if missing:
+        logging.info(f"Restoring {len(missing)} notes from {path}.")
+        bulk_insert_notes(db, missing.values(), log=False)
+    return set(missing)
+
+
+async def lookup_with_index(client, examples, word):
+    """Dictionary entry of ``word`` with an example from the local index.
+
+    krdict is only asked for an example when the index has none.
+    """
+    data = await client.search_word(word)
+    example = examples.example(word, data["pos"] if data else None)
+    if example == "...":
+        example = await client.search_example(word)
+    return data, example
+
+
+async def write_chunk(db, client, rows, csv_file, csv_writer, examples=None):
+    words = [row["Word"] for row in rows]
+    if examples is None:
+        entries = await client.lookup_many(words)
+    else:
+        entries = await asyncio.gather(
+            *(lookup_with_index(client, examples, word) for word in words)
+        )
+    notes = [
+        enrich_note(row, data, example)
+        for row, (data, example) in zip(rows, entries)
+    ]
+    # The notes CSV already records what the import added. It is written
+    # first, see restore_csv_notes.
+    csv_writer.writerows(notes)
+    csv_file.flush()
+    bulk_insert_notes(db, notes, log=False)
+
+
+async def import_vocabulary(
+    db, xlsx_path, csv_path, api_key, url, chunk_size=100, examples=None
+):
+    """Read xlsx -> fetch -> enrich -> write, checkpointing after every chunk.
+
+    Words already stored in ``notes`` (by ``sfld``) are skipped, so an
+    interrupted import can be restarted and only fetches what is missing.
+    A fresh import (no checkpoint, no notes) rewrites the CSV, a resumed
+    one appends to it. Examples are taken from the ``examples`` index when
+    one is given.
+    """
+    start, done = get_checkpoint(db, NOTES_CHECKPOINT)
+    if done:
+        logging.info("Vocabulary already imported.")
+        return
+    if start:
+        logging.info(f"Resuming vocabulary import from row {start}.")
+    known_words = {sfld for (sfld,) in get_rows(db, "SELECT sfld FROM notes")}
+    resume = bool(start or known_words)
+    if resume:
+        known_words |= restore_csv_notes(db, csv_path, known_words)
+
+    csv_file, csv_writer = open_notes_csv(csv_path, append=resume)
+    try:
+        async with DictionaryClient(api_key, url) as client:
+            chunk = []
+            position = start
+            for position, row in read_vocabulary(xlsx_path, start):
+                if row["Word"] not in known_words:
+                    chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    await write_chunk(db, client, chunk, csv_file, csv_writer, examples)
+                    set_checkpoint(db, NOTES_CHECKPOINT, position + 1)
+                    chunk = []
+            if chunk:
+                await write_chunk(db, client, chunk, csv_file, csv_writer, examples)
+            set_checkpoint(db, NOTES_CHECKPOINT, position + 1, done=True)
+    finally:
+        csv_file.close()
+
+
+def initialize_db(db, examples_path=PATH_TO_EXAMPLES):
     KOREAN_DICT_API_KEY = os.getenv("KOREAN_DICT_API_KEY")
 
     PATH_TO_PROJECT = os.getenv("PATH_TO_PROJECT")
     KOREAN_DICT_MAIN_URL = "https://krdict.korean.go.kr/api/search"  # 50_000 tokens/day
-    # https://www.reddit.com/r/Korean/comments/rxvxz6/top_6000_topik_korean_vocabulary_word_list/
-    excel_file = pd.read_excel(
-        f"{PATH_TO_PROJECT}/korean/data/Korean_vocabular_TOPIK.xlsx"
-    )
-    data_list = []
 
     create_tables(db)
     create_triggers(db)
+    create_search(db)
     add_models(db)
+    db.commit()
 
-    for (
-        _,
-        row,
-    ) in excel_file.iterrows():
-        time.sleep(random.randint(1, 3))
-        data = search_word_in_dictionary(
-            row["Word"], KOREAN_DICT_API_KEY, KOREAN_DICT_MAIN_URL
-        )
+    # Examples come from the corpus index (python -m utils.examples) when built.
+    examples = None
+    if examples_path is not None and os.path.exists(examples_path):
+        examples = ExampleIndex(examples_path)
 
-        example = search_example(row["Word"], KOREAN_DICT_API_KEY, KOREAN_DICT_MAIN_URL)
-
-        if data:
-            data["alt_def"] = row["English"]
-            data["wiki_link"] = row["Wiktionary Link"]
-            data["example"] = example
-        else:
-            data = {
-                "word": row["Word"],
-                "definition": "",
-                "pos": "",
-                "target_code": "",
-                "trans_word": "",
-                "alt_def": row["English"],
-                "wiki_link": row["Wiktionary Link"],
-                "wordreference_link": row["Wordreference Link"],
-                "example": example,
-            }
-        data_list.append(data)
-        insert_row_notes(db, data)
-
-    df = pd.DataFrame(data_list)
-    df.to_csv("data/notes.csv", encoding="utf-8", index=False)
+    # https://www.reddit.com/r/Korean/comments/rxvxz6/top_6000_topik_korean_vocabulary_word_list/
+    asyncio.run(
+        import_vocabulary(
+            db,
+            f"{PATH_TO_PROJECT}/korean/data/Korean_vocabular_TOPIK.xlsx",
+            f"{PATH_TO_PROJECT}/korean/data/notes.csv",
+            KOREAN_DICT_API_KEY,
+            KOREAN_DICT_MAIN_URL,
+            examples=examples,
+        )
+    )
+    if examples is not None:
+        examples.close()
     db.close()
 
 
-PATH_TO_DB = os.getenv("PATH_TO_DB")
-db = create_db(PATH_TO_DB)
-try:
-    rows = get_rows(db, "SELECT * from notes LIMIT 1;")
-except sqlite3.OperationalError:
-    rows = None
-if rows is None:
-    initialize_db(db)
+if __name__ == "__main__":
+    PATH_TO_DB = os.getenv("PATH_TO_DB")
+    initialize_db(create_db(PATH_TO_DB))
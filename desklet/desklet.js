@@ -172,24 +172,68 @@ FlashcardDesklet.prototype = {
 
     this.venvPython = env["PATH_TO_PYTHON_ENV"] || "/usr/bin/python3";
     this.scriptPath = env["PATH_TO_SCRIPT"];
-    this.queryRes = env["PATH_TO_QUERY_RES"];
 
     this._update();
   },
 
   /**
-   * Execute python file and initialize the data to display.
+   * Ask the sampler for new cards. The python script is started once with
+   * --serve and kept running: each refresh is one line on its stdin, answered
+   * by one JSON line on its stdout.
    * @returns {boolean} false To prevent infinite loop.
    */
   _update: function() {
-    const command = `"${this.venvPython}" "${this.scriptPath}"`;
-    GLib.spawn_command_line_async(command);
-
-    Mainloop.timeout_add(1000, Lang.bind(this, this._readJson));
+    try {
+      if (!this._sampler) {
+        this._sampler = Gio.Subprocess.new(
+          [this.venvPython, this.scriptPath, "--serve"],
+          Gio.SubprocessFlags.STDIN_PIPE | Gio.SubprocessFlags.STDOUT_PIPE
+        );
+        this._samplerIn = this._sampler.get_stdin_pipe();
+        this._samplerOut = new Gio.DataInputStream({ base_stream: this._sampler.get_stdout_pipe() });
+      }
+      this._samplerIn.write_all(new TextEncoder().encode("\n"), null);
+      this._samplerOut.read_line_async(GLib.PRIORITY_DEFAULT, null, Lang.bind(this, this._readSample));
+    } catch (e) {
+      this._stopSampler();
+      this.flashcardLabel.set_text(e.message);
+    }
 
     return false;
   },
 
+  /**
+   * Read the sample answered by the python script.
+   */
+  _readSample: function(stream, result) {
+    try {
+      const [line] = stream.read_line_finish_utf8(result);
+      if (line === null) {
+        // The script exited: start a new one on the next refresh.
+        this._stopSampler();
+        this.flashcardLabel.set_text("Le script s'est arrêté.");
+        return;
+      }
+      this._setData(JSON.parse(line));
+    } catch (e) {
+      this.flashcardLabel.set_text(e.message);
+    }
+  },
+
+  /**
+   * Stop the python script, if it is running.
+   */
+  _stopSampler: function() {
+    if (this._sampler) {
+      this._sampler.force_exit();
+      this._sampler = null;
+    }
+  },
+
+  on_desklet_removed: function() {
+    this._stopSampler();
+  },
+
   /**
    * Update flashcard's content. Apply a transition.
    */
@@ -208,7 +252,11 @@ FlashcardDesklet.prototype = {
     if (this._progression + 1 <= this._maxProgression) {
       this._progression += 1;
     } else {
+      // Every card was seen: draw new ones.
       this._progression = 1;
+      this.progressionLabel.set_text("1/" + String(this._maxProgression));
+      this._update();
+      return;
     }
     this._getData(this._data, this._progression - 1);
     this.progressionLabel.set_text(String(this._progression) + "/" + String(this._maxProgression),);
@@ -259,29 +307,21 @@ FlashcardDesklet.prototype = {
   },
 
   /**
-   * Read a JSON file that contains the result of a query. The result is the data to display.
+   * Display the result of a query, as written by the python script.
+   * @param {Array|{error: String}} data Rows (tags, flds, sfld, qfmt, afmt) or an error.
    */
-  _readJson: function() {
-    try {
-      const file = Gio.File.new_for_path(this.queryRes);
-      const [success, contents, etag] = file.load_contents(null);
-
-      let decoder = new TextDecoder("utf-8");
-      let jsonString = decoder.decode(contents);
-      const data = JSON.parse(jsonString); // tags, flds, sfld, qfmt, afmt
-
-      if (Array.isArray(data)) {
-        this._getData(data, 0);
-        this._data = data;
-      } else if (data.error) {
-        this.flashcardLabel.set_text(data.error);
-      } else {
-        this.flashcardLabel.set_text("Format JSON inattendu.");
-      }
-
-    } catch (e) {
-      this.flashcardLabel.set_text(e.message)
+  _setData: function(data) {
+    if (Array.isArray(data) && data.length) {
+      this._data = data;
+      this._maxProgression = data.length;
+      this.progressionLabel.set_text("1/" + String(this._maxProgression));
+      this._getData(data, 0);
+    } else if (Array.isArray(data)) {
+      this.flashcardLabel.set_text("Aucune carte.");
+    } else if (data.error) {
+      this.flashcardLabel.set_text(data.error);
+    } else {
+      this.flashcardLabel.set_text("Format JSON inattendu.");
     }
   }
 };
-
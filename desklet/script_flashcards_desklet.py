@@ -2,19 +2,158 @@ import sys
 from dotenv import load_dotenv
 import os
 import json
+import random
+import sqlite3
 
 load_dotenv()
 PATH_TO_PROJECT = os.getenv("PATH_TO_PROJECT")
 PATH_TO_DB = os.getenv("PATH_TO_DB")
-sys.path.append(f"{PATH_TO_PROJECT}/korean")
-from database.sqlite import create_db, get_rows
 
 output_path = f"{PATH_TO_PROJECT}/korean/desklet/notes_output.json"
 
-db = create_db(PATH_TO_DB)
-query = "SELECT tags, flds, sfld, qfmt, afmt from notes, model_templates, models WHERE notes.model_id = models.id AND models.id = model_templates.model_id AND model_templates.id = 1 ORDER BY random() LIMIT 10;"
-rows = get_rows(db, query)
-db.close()
 
-with open(output_path, "w") as f:
-    json.dump([r for r in rows], f)
+def create_sampler_indexes(connection):
+    """Indexes read by CardSampler, also made by database.sqlite.create_indexes.
+
+    Created here so that a refresh does not import database.sqlite and its
+    dependencies (pandas, aiohttp, lxml...).
+    """
+    with connection:
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_notes_model_id ON notes(model_id)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_model_templates_model_id ON model_templates(model_id)"
+        )
+
+
+class CardSampler:
+    """Random notes of one template, without sorting the whole notes table.
+
+    Random ids between the smallest and largest primary key are probed in
+    batches through one prepared statement, keeping the hits in draw order
+    so every note is equally likely. When ids are too sparse for probing
+    (notes imported on different days), the template's ids are read once
+    through the model_id index and sampled in memory instead. Both are
+    refreshed only when another connection changed the database
+    (``PRAGMA data_version``), so a long-lived sampler stays warm.
+    Rows are (tags, flds, sfld, qfmt, afmt), as read by desklet.js.
+    """
+
+    probes = 64
+    max_rounds = 8
+    min_density = 0.1
+
+    def __init__(self, connection, template_id=1, count=10):
+        self.connection = connection
+        self.template_id = template_id
+        self.count = count
+        self.version = None
+        self.template = None
+        self.ids = None
+        self.low = self.high = None
+        self.query = self._select(count)
+        self.probe_query = self._select(self.probes) + " AND model_id = ?"
+
+    @staticmethod
+    def _select(size):
+        placeholders = ", ".join("?" * size)
+        return f"SELECT id, tags, flds, sfld FROM notes WHERE id IN ({placeholders})"
+
+    def _reload(self):
+        cursor = self.connection.cursor()
+        (version,) = cursor.execute("PRAGMA data_version").fetchone()
+        if version == self.version:
+            return
+        self.version = version
+        self.template = cursor.execute(
+            "SELECT model_id, qfmt, afmt FROM model_templates WHERE id = ?",
+            (self.template_id,),
+        ).fetchone()
+        # Two queries: min() and max() together would scan the table.
+        (self.low,) = cursor.execute("SELECT MIN(id) FROM notes").fetchone()
+        (self.high,) = cursor.execute("SELECT MAX(id) FROM notes").fetchone()
+        (total,) = cursor.execute("SELECT COUNT(*) FROM notes").fetchone()
+        self.ids = None
+        if total and total / (self.high - self.low + 1) < self.min_density:
+            self._load_ids()
+
+    def _load_ids(self):
+        self.ids = [
+            note_id
+            for (note_id,) in self.connection.execute(
+                "SELECT id FROM notes WHERE model_id = ?", (self.template[0],)
+            )
+        ]
+
+    def _probe(self):
+        rows = {}
+        for _ in range(self.max_rounds):
+            probe = [random.randint(self.low, self.high) for _ in range(self.probes)]
+            found = {
+                note_id: (tags, flds, sfld)
+                for note_id, tags, flds, sfld in self.connection.execute(
+                    self.probe_query, probe + [self.template[0]]
+                )
+            }
+            for note_id in probe:
+                if note_id in found:
+                    rows.setdefault(note_id, found[note_id])
+                    if len(rows) == self.count:
+                        return list(rows.values())
+        return None
+
+    def sample(self):
+        self._reload()
+        if self.template is None or self.low is None:
+            return []
+        rows = self._probe() if self.ids is None else None
+        if rows is None:
+            if self.ids is None:
+                self._load_ids()
+            ids = random.sample(self.ids, min(self.count, len(self.ids)))
+            # Pad to a fixed number of parameters to keep one prepared statement.
+            params = ids + [None] * (self.count - len(ids))
+            found = {
+                note_id: (tags, flds, sfld)
+                for note_id, tags, flds, sfld in self.connection.execute(
+                    self.query, params
+                )
+            }
+            rows = [found[note_id] for note_id in ids if note_id in found]
+        _, qfmt, afmt = self.template
+        return [(*row, qfmt, afmt) for row in rows]
+
+
+def write_sample(sampler, path=output_path):
+    rows = sampler.sample()
+    with open(path, "w") as f:
+        json.dump([r for r in rows], f)
+    return rows
+
+
+def serve(sampler, path=output_path):
+    """Write a new sample for every line read on stdin.
+
+    Keeps the interpreter, the connection and the ids warm between
+    refreshes; each sample is also echoed as one JSON line on stdout,
+    or ``{"error": ...}`` if the database could not be read.
+    """
+    for _ in sys.stdin:
+        try:
+            rows = write_sample(sampler, path)
+        except sqlite3.Error as e:
+            print(json.dumps({"error": str(e)}), flush=True)
+            continue
+        print(json.dumps(rows), flush=True)
+
+
+if __name__ == "__main__":
+    db = sqlite3.connect(PATH_TO_DB)
+    create_sampler_indexes(db)
+    sampler = CardSampler(db)
+    if "--serve" in sys.argv[1:]:
+        serve(sampler)
+    else:
+        write_sample(sampler)
+    db.close()
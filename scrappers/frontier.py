@@ -0,0 +1,89 @@
+import os
+import time
+import sqlite3
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PATH_TO_FRONTIER = os.getenv("PATH_TO_FRONTIER", "frontier.sqlite3")
+
+DISCOVERED = "discovered"
+FETCHED = "fetched"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+def read_urls(path):
+    try:
+        with open(path, "r") as file:
+            return [line.rstrip("\n") for line in file if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+class Frontier:
+    """Persistent state of every url seen by a crawl stage.
+
+    Urls are tracked per ``stage`` ("article" links from the listing pages,
+    "html" viewer pages...) as discovered, fetched, failed or skipped. The
+    whole table is kept in a dict for O(1) lookups and every change is
+    written through to SQLite, so a later run resumes where this one ended.
+    """
+
+    def __init__(self, path=PATH_TO_FRONTIER):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS frontier (stage TEXT NOT NULL, url TEXT NOT NULL, state TEXT NOT NULL, updated REAL NOT NULL, PRIMARY KEY (stage, url))"
+        )
+        self.states = dict()
+        for stage, url, state in self.connection.execute(
+            "SELECT stage, url, state FROM frontier"
+        ):
+            self.states[(stage, url)] = state
+
+    def state(self, stage, url):
+        return self.states.get((stage, url))
+
+    def __contains__(self, key):
+        return key in self.states
+
+    def add(self, stage, urls):
+        """Mark unknown urls as discovered and return how many were new."""
+        new = [url for url in dict.fromkeys(urls) if (stage, url) not in self.states]
+        self._write(stage, new, DISCOVERED)
+        return len(new)
+
+    def mark(self, stage, urls, state):
+        if isinstance(urls, str):
+            urls = [urls]
+        self._write(stage, list(urls), state)
+
+    def pending(self, stage):
+        """Urls of ``stage`` that are not fetched or skipped yet."""
+        return [
+            url
+            for (url_stage, url), state in self.states.items()
+            if url_stage == stage and state in (DISCOVERED, FAILED)
+        ]
+
+    def counts(self, stage):
+        counts = dict()
+        for (url_stage, _), state in self.states.items():
+            if url_stage == stage:
+                counts[state] = counts.get(state, 0) + 1
+        return counts
+
+    def _write(self, stage, urls, state):
+        if not urls:
+            return
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO frontier (stage, url, state, updated) VALUES (?, ?, ?, ?)",
+                [(stage, url, state, now) for url in urls],
+            )
+        for url in urls:
+            self.states[(stage, url)] = state
+
+    def close(self):
+        self.connection.close()
@@ -1,23 +1,31 @@
+import re
+import json
 import bs4
 import requests
-from seleniumwire import webdriver
 import aiohttp
 import asyncio
-import random
 import os
 from dotenv import load_dotenv
+import sys
 import logging
 import pandas as pd
 from datetime import datetime
 import time
+from collections import deque
 
 load_dotenv()
+sys.path.append(f"{os.getenv('PATH_TO_PROJECT')}/korean")
+from scrappers.frontier import Frontier, FETCHED, FAILED, read_urls
+
 logging.basicConfig(level=logging.INFO)
 
 MAIN_URL = "https://gongu.copyright.or.kr/gongu/wrt/wrtCl/listWrtText.do?menuNo=200019&pageUnit=96"
 DOMAIN = "https://gongu.copyright.or.kr"
 CUSTOM_URL = "https://gongu.copyright.or.kr/gongu/wrt/wrtCl/listWrtText.do"
 USER_AGENT = os.getenv("USER_AGENT")
+VIEWER_URL = DOMAIN + "/viewer/skin/doc.html?fn={fn}&rs={rs}"
+VIEWER_PARAMS = re.compile(r"fn=([\w.-]+)(?:&|&amp;)rs=(/webview/[\w./-]+?/)[\"'&]")
+VIEWER_PAGES = re.compile(r"[\w.-]+\.files/\d+\.html")
 
 
 async def extract_data(text):
@@ -33,53 +41,160 @@ async def extract_data(text):
     return links_list
 
 
-def extract_html(data, retries=3):
+def extract_html(links, frontier, retries=3):
+    # Chrome fallback for articles whose viewer urls cannot be resolved over HTTP.
+    from seleniumwire import webdriver
+
     logging.info("Saving xhtml file...")
     seleniumwire_options = {"disable_encoding": True}
     aborted = 0
     new_htmls = 0
     requested = 0
-    try:
-        html_logs = []
-        with open("html_logs", "r") as file:
-            lines = file.readlines()
-        for i in range(0, len(lines)):
-            html_logs.append(lines[i].rstrip("\n"))
-    except Exception as e:
-        logging.exception(str(e))
-        html_logs = []
     driver = webdriver.Chrome(seleniumwire_options=seleniumwire_options)
     driver.implicitly_wait(10)
-    for array in data:
-        if array is not None and len(array) > 0:
-            for link in array:
-                for attempt in range(retries):
-                    try:
-                        driver.get(link)
-                        for request in driver.requests:
-                            requested += 1
-                            if request.response and ".html" in request.url:
-                                with (
-                                    open("htmls.txt", "a") as htmls,
-                                    open("html_logs.txt", "a") as logs,
-                                ):
-                                    if request.url not in html_logs:
-                                        new_htmls += 1
-                                        print(request.url, file=htmls)
-                                        print(request.url, file=logs)
-                                        html_logs.append(request.url)
-                            else:
-                                logging.info(
-                                    f"{request.url} aborted: not an html url or could not get response."
-                                )
-                                aborted += 1
-                                request.abort()
-                    except Exception as e:
-                        logging.exception(str(e))
+    with open("htmls.txt", "a") as htmls:
+        for link in links:
+            for attempt in range(retries):
+                try:
+                    driver.get(link)
+                    for request in driver.requests:
+                        requested += 1
+                        if request.response and ".html" in request.url:
+                            if frontier.add("html", [request.url]):
+                                new_htmls += 1
+                                print(request.url, file=htmls)
+                        else:
+                            logging.info(
+                                f"{request.url} aborted: not an html url or could not get response."
+                            )
+                            aborted += 1
+                            request.abort()
+                    del driver.requests
+                    frontier.mark("article", link, FETCHED)
+                    break
+                except Exception as e:
+                    logging.exception(str(e))
+            else:
+                frontier.mark("article", link, FAILED)
     driver.quit()
     return aborted, new_htmls, requested
 
 
+async def get_text(session, url, limiter):
+    """GET ``url`` through ``limiter``.
+
+    Returns None when the page does not exist (4xx) and raises on 429, 5xx
+    and network errors, which are worth retrying.
+    """
+    await limiter.acquire()
+    try:
+        async with session.get(url) as response:
+            # A missing page is an answer, not a sign of overload.
+            limiter.record(response.status == 429 or response.status >= 500)
+            if response.status == 200:
+                return await response.text()
+            if response.status == 429 or response.status >= 500:
+                response.raise_for_status()
+            return None
+    except aiohttp.ClientResponseError:
+        raise
+    except Exception:
+        limiter.record(True)
+        raise
+
+
+async def resolve_viewer_urls(session, link, limiter):
+    """Return the viewer, ``.view.xhtml`` and page urls of an article.
+
+    The article page references ``doc.html?fn=<file>&rs=<dir>``. The xhtml
+    lives at ``<dir><file>.view.xhtml`` and lists the ``<file>.files/N.html``
+    pages holding the text. Returns None when the article does not follow
+    this layout.
+    """
+    text = await get_text(session, link, limiter)
+    match = VIEWER_PARAMS.search(text) if text is not None else None
+    if match is None:
+        return None
+    fn, rs = match.groups()
+    base = DOMAIN + rs
+    xhtml = f"{base}{fn}.view.xhtml"
+    text = await get_text(session, xhtml, limiter)
+    if text is None:
+        return None
+    pages = dict.fromkeys(VIEWER_PAGES.findall(text))
+    return [VIEWER_URL.format(fn=fn, rs=rs), xhtml] + [base + page for page in pages]
+
+
+async def resolve_html(session, frontier, limiter=None, concurrency=16, retries=3):
+    """Resolve the viewer urls of every pending article over plain HTTP.
+
+    Only articles the frontier has not fetched yet are resolved, through
+    ``limiter`` (the crawl's, so both share one rate budget). Throttled or
+    failing requests are retried with backoff; articles that still fail
+    stay pending for the next run. Each article is recorded in the
+    frontier and htmls.txt as soon as it resolves, so an interrupted run
+    keeps its progress. Only articles that do not follow the viewer layout
+    are handed to the Chrome-based ``extract_html``.
+    Returns (aborted, new_htmls, requested) like it.
+    """
+    logging.info("Resolving xhtml files...")
+    links = frontier.pending("article")
+    frontier.add("html", read_urls("htmls.txt"))
+    limiter = limiter or AdaptiveRateLimiter()
+    semaphore = asyncio.Semaphore(concurrency)
+    start_time = time.time()
+    # Marks an article that kept failing, as opposed to None (not a viewer).
+    gave_up = object()
+
+    async def resolve(link):
+        async with semaphore:
+            for attempt in range(retries):
+                try:
+                    return link, await resolve_viewer_urls(session, link, limiter)
+                except Exception as e:
+                    logging.warning(f"Resolving {link} failed: {e}")
+                if attempt < retries - 1:
+                    await asyncio.sleep(2**attempt)
+            return link, gave_up
+
+    new_htmls = 0
+    fallback = []
+    deferred = 0
+    tasks = [asyncio.create_task(resolve(link)) for link in links]
+    try:
+        with open("htmls.txt", "a") as htmls:
+            for task in asyncio.as_completed(tasks):
+                link, urls = await task
+                if urls is gave_up:
+                    deferred += 1
+                    continue
+                if urls is None:
+                    fallback.append(link)
+                    continue
+                new_urls = [url for url in urls if ("html", url) not in frontier]
+                for url in new_urls:
+                    print(url, file=htmls)
+                htmls.flush()
+                frontier.add("html", new_urls)
+                frontier.mark("article", link, FETCHED)
+                new_htmls += len(new_urls)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    duration = time.time() - start_time
+    logging.info(
+        f"Resolved {len(links) - len(fallback) - deferred}/{len(links)} articles over HTTP in {duration:.2f}s, "
+        f"{deferred} left for the next run."
+    )
+    aborted, requested = 0, 0
+    if fallback:
+        logging.info(f"Falling back to Chrome for {len(fallback)} articles.")
+        aborted, fallback_htmls, requested = extract_html(fallback, frontier, retries)
+        new_htmls += fallback_htmls
+    return aborted, new_htmls, requested
+
+
 def update_logs(total_pages, aborted, new_htmls, requested, start_time):
     now = datetime.now()
     date_time_str = now.strftime("%Y%m%d")
@@ -99,43 +214,186 @@ def update_logs(total_pages, aborted, new_htmls, requested, start_time):
     logging.info(f"NEW LOGS: {date_time_str}")
 
 
-async def fetch(session, page, retries=3):
-    await asyncio.sleep(random.uniform(3, 7))
+class AdaptiveRateLimiter:
+    """Global requests-per-second budget shared by every crawler worker.
+
+    ``max_rate`` (``rate`` by default) is a ceiling the rate never exceeds.
+    The rate grows additively after each request that was served. It is
+    halved (AIMD) when more than ``threshold`` of the last ``window``
+    requests signalled overload (429/5xx, network errors and timeouts), and
+    the window then restarts so one burst of failures only counts once.
+    """
+
+    def __init__(
+        self,
+        rate=1.0,
+        min_rate=0.1,
+        max_rate=None,
+        increase=0.05,
+        window=10,
+        threshold=0.2,
+    ):
+        self.max_rate = rate if max_rate is None else max_rate
+        self.min_rate = min(min_rate, self.max_rate)
+        self.rate = min(rate, self.max_rate)
+        self.increase = increase
+        self.threshold = threshold
+        self.outcomes = deque(maxlen=window)
+        self.next_slot = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.failures = 0
+
+    async def acquire(self):
+        async with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + 1 / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record(self, failed):
+        self.outcomes.append(failed)
+        if failed:
+            self.failures += 1
+        if (
+            len(self.outcomes) == self.outcomes.maxlen
+            and sum(self.outcomes) / len(self.outcomes) > self.threshold
+        ):
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.outcomes.clear()
+            logging.warning(
+                f"Too many failed requests, lowering rate to {self.rate:.2f} req/s."
+            )
+        elif not failed:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+async def fetch(session, page, limiter, url=CUSTOM_URL):
+    params = {
+        "menuNo": "200019",
+        "pageUnit": "96",
+        "sorteSe": "date",
+        "pageIndex": page,
+    }
+    await limiter.acquire()
+    start = time.monotonic()
+    try:
+        async with session.get(url, params=params) as response:
+            text = await response.text() if response.status == 200 else None
+            # Like get_text: only 429/5xx and network errors mean overload.
+            limiter.record(response.status == 429 or response.status >= 500)
+            if response.status == 503:
+                logging.warning(f"Rate limited on page {page}.")
+            if text is None:
+                return response.status, None, time.monotonic() - start
+    except Exception as e:
+        limiter.record(True)
+        logging.exception(str(e))
+        return None, None, time.monotonic() - start
+    try:
+        links = await extract_data(text)
+    except Exception as e:
+        # A page without the article list fails, but is no sign of overload.
+        logging.warning(f"Could not parse page {page}: {e!r}")
+        return 200, None, time.monotonic() - start
+    return 200, links, time.monotonic() - start
+
+
+async def crawl(
+    session,
+    pages,
+    on_page=None,
+    workers=4,
+    rate=1.0,
+    retries=3,
+    url=CUSTOM_URL,
+    limiter=None,
+):
+    """Fetch listing pages with ``workers`` concurrent workers.
+
+    Every request goes through one ``AdaptiveRateLimiter`` capped at
+    ``rate`` requests per second, or through ``limiter`` when given. Pages
+    that fail are retried after the whole pass, up to ``retries`` passes.
+    ``on_page`` is called with one record per page as soon as the page
+    succeeds, or after the last pass for pages that kept failing. Links are
+    not kept in memory after that. Returns the number of pages that
+    succeeded.
+    """
+    limiter = limiter or AdaptiveRateLimiter(rate=rate)
+    attempts = {page: [] for page in pages}
+
+    def complete(page, status, links):
+        if on_page is not None:
+            on_page(
+                {
+                    "page": page,
+                    "status": "ok" if links is not None else "failed",
+                    "http_status": status,
+                    "links": links or [],
+                    "attempts": len(attempts[page]),
+                    "latency": attempts[page],
+                    "timestamp": time.time(),
+                }
+            )
+
+    async def worker(queue, last_pass):
+        while True:
+            page = await queue.get()
+            try:
+                status, links, latency = await fetch(session, page, limiter, url)
+                attempts[page].append(round(latency, 3))
+                logging.info(f"Page {page}: status {status} in {latency:.2f}s.")
+                if links is not None:
+                    done.add(page)
+                    complete(page, status, links)
+                elif last_pass:
+                    complete(page, status, None)
+            finally:
+                queue.task_done()
+
+    done = set()
+    pending = list(pages)
     for attempt in range(retries):
-        try:
-            params = {
-                "menuNo": "200019",
-                "pageUnit": "96",
-                "sorteSe": "date",
-                "pageIndex": page,
-            }
-            async with session.get(CUSTOM_URL, params=params) as response:
-                if response.status == 200:
-                    text = await response.text()
-                    links = await extract_data(text)
-                    return links
-                elif response.status == 503:
-                    wait_time = random.uniform(2, 7)
-                    logging.warning(
-                        f"Rate limited on page {page}. Retrying in {wait_time:.2f}s..."
-                    )
-                    await asyncio.sleep(wait_time)
-                elif attempt == retries - 1:
-                    await asyncio.sleep(30)
-        except Exception as e:
-            logging.exception(str(e))
-    logging.warning(
-        f"Extracting data from page {page} failed after {retries} attempts."
-    )
-    return None
+        if not pending:
+            break
+        if attempt:
+            logging.info(f"Retrying {len(pending)} failed pages.")
+        queue = asyncio.Queue()
+        for page in pending:
+            queue.put_nowait(page)
+        tasks = [
+            asyncio.create_task(worker(queue, attempt == retries - 1))
+            for _ in range(workers)
+        ]
+        await queue.join()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        pending = [page for page in pending if page not in done]
+
+    latencies = [latency for page in attempts.values() for latency in page]
+    if latencies:
+        logging.info(
+            f"Crawled {len(done)}/{len(attempts)} pages, "
+            f"mean latency {sum(latencies) / len(latencies):.2f}s, "
+            f"{limiter.failures} failed requests, final rate {limiter.rate:.2f} req/s."
+        )
+    for page in pending:
+        logging.warning(f"Extracting data from page {page} failed after {retries} attempts.")
+    return len(done)
+
+
+def read_pages(path="pages.jsonl"):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
 
 
 async def scrape():
     logging.info("##### SCRAPPING GONGU #####")
     start_time = time.time()
-    tasks = []
-    all_data = []
     retries = 3
+    frontier = Frontier()
 
     try:
         response = requests.get(MAIN_URL)
@@ -145,19 +403,33 @@ async def scrape():
         for tag_a_ in pages.select("a"):
             tag_a_.extract()
         total_pages_ = [int(i) for i in pages.get_text().split() if i.isdigit()][1]
+        limiter = AdaptiveRateLimiter()
         async with aiohttp.ClientSession(headers={"user-agent": USER_AGENT}) as session:
-            for page in range(1, total_pages_):
-                tasks.append(fetch(session, page, retries))
-            articles = await asyncio.gather(*tasks)
-
-        all_data.extend(articles)
-        with open("pages.txt", "w") as f:
-            print(all_data, file=f)
-        aborted_, new_htmls_, requested_ = extract_html(all_data, retries)
+            with open("pages.jsonl", "a", encoding="utf-8") as pages_file:
+
+                def on_page(record):
+                    print(json.dumps(record, ensure_ascii=False), file=pages_file)
+                    pages_file.flush()
+                    frontier.add("article", record["links"])
+
+                await crawl(
+                    session,
+                    range(1, total_pages_),
+                    on_page,
+                    retries=retries,
+                    limiter=limiter,
+                )
+            logging.info(f"{len(frontier.pending('article'))} articles to resolve.")
+            aborted_, new_htmls_, requested_ = await resolve_html(
+                session, frontier, limiter, retries=retries
+            )
         update_logs(total_pages_, aborted_, new_htmls_, requested_, start_time)
     except Exception as e:
         logging.exception(str(e))
         logging.info("Ending web scrapping.")
+    finally:
+        frontier.close()
 
 
-asyncio.run(scrape())
+if __name__ == "__main__":
+    asyncio.run(scrape())
@@ -1,32 +1,98 @@
+import os
+import sys
+import time
+import asyncio
 import logging
+from concurrent.futures import ProcessPoolExecutor
+import aiohttp
 import bs4  # type: ignore
-import requests  # type: ignore
+from dotenv import load_dotenv
+
+load_dotenv()
+sys.path.append(f"{os.getenv('PATH_TO_PROJECT')}/korean")
+from scrappers.frontier import Frontier, FETCHED, FAILED, SKIPPED, read_urls
 
 logging.basicConfig(level=logging.INFO)
 
 
-def extract_text():
+def parse_spans(text, parser="lxml"):
+    soup = bs4.BeautifulSoup(text, parser, parse_only=bs4.SoupStrainer("span"))
+    return [span.text for span in soup.find_all("span") if span]
+
+
+async def extract_texts(
+    htmls, frontier, output_path, concurrency=16, parser="lxml", workers=None
+):
+    """Fetch pages over one pooled session and append their text to ``output_path``.
+
+    Parsing runs on a process pool since BeautifulSoup is CPU-bound, and a
+    single buffered writer appends the text of each document as it is
+    parsed. ``parser`` can be "lxml" (fast) or "html.parser".
+    """
+    start_time = time.time()
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async def fetch(session, html):
+        async with semaphore:
+            try:
+                async with session.get(html) as response:
+                    if response.status == 200:
+                        return html, await response.text()
+            except Exception as e:
+                logging.warning(f"Fetching {html} failed: {e}")
+            return html, None
+
+    documents = 0
+    with (
+        ProcessPoolExecutor(workers) as executor,
+        open(output_path, "a", encoding="utf-8") as file,
+    ):
+
+        async def process(session, html):
+            html, text = await fetch(session, html)
+            if text is None:
+                return html, None
+            spans = await loop.run_in_executor(executor, parse_spans, text, parser)
+            return html, spans
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+            tasks = [process(session, html) for html in htmls]
+            for processed in asyncio.as_completed(tasks):
+                html, spans = await processed
+                if spans is None:
+                    frontier.mark("html", html, FAILED)
+                    continue
+                if spans:
+                    file.write("\n".join(spans) + "\n")
+                frontier.mark("html", html, FETCHED)
+                documents += 1
+
+    duration = time.time() - start_time
+    logging.info(
+        f"Extracted {documents}/{len(htmls)} documents in {duration:.2f}s "
+        f"({documents / max(duration, 1e-9):.1f} docs/sec)."
+    )
+    return documents
+
+
+def extract_text(parser="lxml"):
     logging.info("##### SCRAPPING HTML LINKS FOR KOREAN TEXTS #####")
-    htmls = []
-    with open("htmls.txt", "r") as file:
-        lines = file.readlines()
-        for i in range(0, len(lines)):
-            htmls.append(lines[i].rstrip("\n"))
-
-    htmls = list(set(htmls))
-    htmls = [html for html in htmls if ".html" in html]
+    frontier = Frontier()
+    frontier.add("html", read_urls("htmls.txt"))
+
+    pending = frontier.pending("html")
+    htmls = [html for html in pending if ".html" in html]
+    frontier.mark("html", [html for html in pending if ".html" not in html], SKIPPED)
     if len(htmls) > 0:
-        for html in htmls:
-            response = requests.get(html)
-            if response:
-                soup = bs4.BeautifulSoup(response.text, "html.parser")
-                paragraphs = soup.find_all("span")
-                for paragraph in paragraphs:
-                    with open("data/korean_texts.txt", "a") as file:
-                        if paragraph:
-                            print(paragraph.text, file=file)
+        asyncio.run(
+            extract_texts(htmls, frontier, "data/korean_texts.txt", parser=parser)
+        )
     else:
         logging.warning("No html links.")
+    frontier.close()
 
 
-extract_text()
+if __name__ == "__main__":
+    extract_text()
@@ -1,20 +1,123 @@
 import os
 import json
+import time
+import logging
+import multiprocessing
 from dotenv import load_dotenv
 
 load_dotenv()
+logging.basicConfig(level=logging.INFO)
 
 directory = f"{os.getenv('PATH_TO_PROJECT')}/korean/data/melon"
+output_path = f"{os.getenv('PATH_TO_PROJECT')}/korean/data/lyrics.jsonl"
 
+SONG_FIELDS = [
+    "song_id",
+    "song_name",
+    "album",
+    "artist",
+    "genre",
+    "release_date",
+    "lyric_writer",
+    "composer",
+    "arranger",
+]
 
-for root, _, files in os.walk(directory):
-    for filename in files:  # loop through files in the current directory
-        path = os.path.join(root, filename)
-        with (
-            open(path, "r", encoding="utf-8") as file,
-            open("data/lyrics.txt", "a") as lyrics_file,
-        ):
+
+def extract_song(path):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
             data = json.load(file)
-            lines = data["lyrics"]["lines"]
-            for line in lines:
-                print(line, file=lyrics_file)
+        song = {field: data.get(field) for field in SONG_FIELDS}
+        song["lyrics"] = data["lyrics"]["lines"]
+        return path, song
+    except Exception as e:
+        logging.warning(f"Could not read {path}: {e}")
+        return path, None
+
+
+def list_chart_files(directory):
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith(".json"):
+                yield os.path.join(root, filename)
+
+
+def load_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return set()
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return set(json.load(f))
+
+
+def load_song_ids(output_path):
+    """Song ids of ``output_path``.
+
+    A last line without its newline was cut short by a killed run and is
+    truncated away; its chart file is not in the manifest yet, so the song
+    is extracted again.
+    """
+    song_ids = set()
+    position = 0
+    with open(output_path, "rb+") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                logging.warning(f"Dropping a truncated last line of {output_path}.")
+                f.truncate(position)
+                break
+            song_ids.add(json.loads(line)["song_id"])
+            position += len(line)
+    return song_ids
+
+
+def extract_lyrics(directory, output_path, incremental=True, workers=None):
+    """Write one JSON line per unique song (by ``song_id``) found in the charts.
+
+    Chart files are parsed on a process pool and written by a single writer.
+    In incremental mode, the chart files listed in ``<output>.manifest`` are
+    skipped and new songs are appended; otherwise the output is rebuilt.
+    """
+    start_time = time.time()
+    manifest_path = output_path + ".manifest"
+    incremental = incremental and os.path.exists(output_path)
+    processed = load_manifest(manifest_path) if incremental else set()
+    song_ids = load_song_ids(output_path) if incremental else set()
+
+    paths = sorted(
+        path
+        for path in list_chart_files(directory)
+        if os.path.relpath(path, directory) not in processed
+    )
+    logging.info(f"{len(paths)} new chart files, {len(song_ids)} known songs.")
+
+    written = 0
+    tmp_path = output_path + ".tmp"
+    write_path, mode = (output_path, "a") if incremental else (tmp_path, "w")
+    with (
+        multiprocessing.Pool(workers) as pool,
+        open(write_path, mode, encoding="utf-8") as output,
+    ):
+        for path, song in pool.imap(extract_song, paths, chunksize=64):
+            if song is None:
+                continue
+            processed.add(os.path.relpath(path, directory))
+            if song["song_id"] in song_ids:
+                continue
+            song_ids.add(song["song_id"])
+            output.write(json.dumps(song, ensure_ascii=False) + "\n")
+            written += 1
+    if not incremental:
+        os.replace(tmp_path, output_path)
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(sorted(processed), f)
+
+    duration = time.time() - start_time
+    logging.info(
+        f"Wrote {written} new songs ({len(song_ids)} total) from {len(paths)} files in {duration:.2f}s."
+    )
+    return written
+
+
+if __name__ == "__main__":
+    extract_lyrics(directory, output_path)
@@ -1,34 +1,106 @@
 # https://github.com/storidient/KoCoNovel/tree/main
+import os
+import json
+import asyncio
 import logging
+import aiohttp
 import pandas as pd
-import requests
 import bs4
 
 logging.basicConfig(level=logging.INFO)
-logging.info("##### SCRAPPING WIKISOURCE #####")
 
 URL = "https://ko.wikisource.org/wiki/"
+NOVELS_DIR = "./data/novels"
+VALIDATORS_PATH = os.path.join(NOVELS_DIR, ".validators.json")
 
 
-def extract_novels():
-    csv_file = pd.read_csv("./data/list_novels.csv")
-    for _, row in csv_file.iterrows():
+def parse_novel(text):
+    content = bs4.SoupStrainer("div", id="mw-content-text")
+    soup = bs4.BeautifulSoup(text, "lxml", parse_only=content)
+    main = soup.find("div", {"id": "mw-content-text"})
+    return [p.get_text().strip() for p in main.find_all("p") if p.get_text().strip()]
+
+
+def write_atomic(path, lines):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+async def download_novel(session, semaphore, row, validators, refresh):
+    """Download one novel, returning "skipped", "unchanged", "saved" or "failed"."""
+    title = row["Translated Title"]
+    path = os.path.join(NOVELS_DIR, f"{title}.txt")
+    if os.path.exists(path) and not refresh:
+        return "skipped"
+
+    headers = {}
+    if os.path.exists(path):
+        cached = validators.get(title, {})
+        if "etag" in cached:
+            headers["If-None-Match"] = cached["etag"]
+        if "last_modified" in cached:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    link = URL + row["Korean Title"].replace(" ", "_")
+    async with semaphore:
         logging.info(f"Scrapping wikisource for: {row['Korean Title']}")
-        link = URL + row["Korean Title"].replace(" ", "_")
         try:
-            response = requests.get(link)
-            soup = bs4.BeautifulSoup(response.text, "html.parser")
-            main = soup.find("div", {"id": "mw-content-text"})
-            paragraphs = main.find_all("p")
-            for p in paragraphs:
-                with open(
-                    f"./data/novels/{row['Translated Title']}.txt",
-                    "a",
-                    encoding="utf-8",
-                ) as f:
-                    print(p, file=f)
+            async with session.get(link, headers=headers) as response:
+                if response.status == 304:
+                    return "unchanged"
+                response.raise_for_status()
+                text = await response.text()
+                validators[title] = {
+                    key: response.headers[header]
+                    for key, header in (
+                        ("etag", "ETag"),
+                        ("last_modified", "Last-Modified"),
+                    )
+                    if header in response.headers
+                }
+            paragraphs = parse_novel(text)
         except Exception as e:
             logging.exception(str(e))
+            return "failed"
+
+    write_atomic(path, paragraphs)
+    return "saved"
+
+
+async def extract_novels(refresh=False, concurrency=4):
+    """Download every novel of list_novels.csv into data/novels/.
+
+    Novels already on disk are skipped unless ``refresh`` is set, in which
+    case conditional requests make unchanged pages cost a 304.
+    """
+    logging.info("##### SCRAPPING WIKISOURCE #####")
+    csv_file = pd.read_csv("./data/list_novels.csv")
+    os.makedirs(NOVELS_DIR, exist_ok=True)
+    try:
+        with open(VALIDATORS_PATH, "r", encoding="utf-8") as f:
+            validators = json.load(f)
+    except FileNotFoundError:
+        validators = {}
+
+    semaphore = asyncio.Semaphore(concurrency)
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=concurrency)
+    ) as session:
+        statuses = await asyncio.gather(
+            *(
+                download_novel(session, semaphore, row, validators, refresh)
+                for row in csv_file.to_dict("records")
+            )
+        )
+
+    with open(VALIDATORS_PATH, "w", encoding="utf-8") as f:
+        json.dump(validators, f, ensure_ascii=False, indent=2)
+    summary = {status: statuses.count(status) for status in sorted(set(statuses))}
+    logging.info(f"Novels: {summary}")
+    return statuses
 
 
-extract_novels()
+if __name__ == "__main__":
+    asyncio.run(extract_novels())
@@ -0,0 +1,202 @@
+from dotenv import load_dotenv
+import os
+import json
+import time
+import sqlite3
+import inspect
+import logging
+import functools
+import threading
+
+load_dotenv()
+
+PATH_TO_CACHE = os.getenv("PATH_TO_CACHE", "data/cache.sqlite3")
+CACHE_OFFLINE = os.getenv("CACHE_OFFLINE", "0") == "1"
+
+MISS = object()
+
+
+class ResponseCache:
+    """SQLite-backed cache of provider responses keyed by (provider, word, params).
+
+    Entries older than ``ttl`` seconds are refetched, and the least recently
+    used entries are evicted once the cache holds more than ``max_entries``.
+    In ``offline`` mode expired entries are still served and misses never
+    reach the network.
+    """
+
+    def __init__(
+        self,
+        path=PATH_TO_CACHE,
+        ttl=30 * 86_400,
+        max_entries=200_000,
+        offline=CACHE_OFFLINE,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses (provider TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (provider, key))"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS usage (provider TEXT NOT NULL, day TEXT NOT NULL, used INTEGER NOT NULL, PRIMARY KEY (provider, day))"
+        )
+
+    @staticmethod
+    def make_key(word, params=None):
+        return json.dumps([word, params or {}], ensure_ascii=False, sort_keys=True)
+
+    def get(self, provider, word, params=None):
+        key = self.make_key(word, params)
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value, created FROM responses WHERE provider = ? AND key = ?",
+                (provider, key),
+            ).fetchone()
+            if row is None or (not self.offline and now - row[1] > self.ttl):
+                self.misses += 1
+                return MISS
+            self.connection.execute(
+                "UPDATE responses SET accessed = ? WHERE provider = ? AND key = ?",
+                (now, provider, key),
+            )
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, provider, word, value, params=None):
+        key = self.make_key(word, params)
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (provider, key, value, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (provider, key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self.writes += 1
+            if self.writes % 256 == 0:
+                self._evict()
+
+    def spend(self, provider, day, limit):
+        """Count one request of ``provider`` on ``day``.
+
+        Returns False, without counting it, once ``limit`` requests were
+        made that day. The count is shared by every process using the cache.
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "INSERT INTO usage (provider, day, used) VALUES (?, ?, 1) ON CONFLICT (provider, day) DO UPDATE SET used = used + 1 WHERE used < ?",
+                (provider, day, limit),
+            )
+            return cursor.rowcount > 0 and limit > 0
+
+    def usage(self, provider, day):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT used FROM usage WHERE provider = ? AND day = ?",
+                (provider, day),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def evict(self):
+        with self.lock:
+            return self._evict()
+
+    def _evict(self):
+        (size,) = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()
+        excess = size - self.max_entries
+        if excess <= 0:
+            return 0
+        self.connection.execute(
+            "DELETE FROM responses WHERE rowid IN (SELECT rowid FROM responses ORDER BY accessed LIMIT ?)",
+            (excess,),
+        )
+        logging.info(f"Evicted {excess} cached responses.")
+        return excess
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        self.connection.close()
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+
+def cached(provider, ignore=("self",)):
+    """Cache the result of a (sync or async) lookup in the default cache.
+
+    The first argument is the word; every other argument except those in
+    ``ignore`` (API keys, clients...) is part of the key. ``None`` results
+    are treated as failures and never stored.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        names = [name for name in signature.parameters if name not in ignore]
+
+        def split(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {name: bound.arguments[name] for name in names}
+            word = arguments.pop(names[0])
+            return word, arguments
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache = get_cache()
+                word, params = split(args, kwargs)
+                value = cache.get(provider, word, params)
+                if value is not MISS:
+                    return value
+                if cache.offline:
+                    return None
+                value = await func(*args, **kwargs)
+                if value is not None:
+                    cache.set(provider, word, value, params)
+                return value
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            word, params = split(args, kwargs)
+            value = cache.get(provider, word, params)
+            if value is not MISS:
+                return value
+            if cache.offline:
+                return None
+            value = func(*args, **kwargs)
+            if value is not None:
+                cache.set(provider, word, value, params)
+            return value
+
+        return wrapper
+
+    return decorator
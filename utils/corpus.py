@@ -0,0 +1,282 @@
+import os
+import re
+import glob
+import json
+import html
+import time
+import hashlib
+import logging
+import unicodedata
+import multiprocessing
+from itertools import islice
+from dotenv import load_dotenv
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO)
+
+DATA_DIR = f"{os.getenv('PATH_TO_PROJECT')}/korean/data"
+CLEANED_DIR = os.path.join(DATA_DIR, "cleaned")
+STOP_WORDS_PATH = os.path.join(DATA_DIR, "stop_words.txt")
+# Bump when the cleaning rules change so every output is rebuilt.
+CLEANER_VERSION = 2
+
+MARKUP = re.compile(r"<[^>]+>")
+# Hanja glosses such as "파주(坡州)".
+HANJA_GLOSS = re.compile(r"\([^()]*[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff][^()]*\)")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|(?<=[.!?][\"'』」)])\s+")
+# Sentence punctuation (except decimal points and thousands separators),
+# double quotes and brackets; apostrophes and dashes are only stripped
+# around words.
+PUNCTUATION = re.compile(r"(?<!\d)[.,]|[.,](?!\d)|[!?;:\"()\[\]「」『』《》〈〉<>]")
+WHITESPACE = re.compile(r"\s+")
+EDGES = "'-"
+NORMALIZE = str.maketrans(
+    {
+        # Full-width forms (！, ？, ，...) to ASCII.
+        **{chr(c): chr(c - 0xFEE0) for c in range(0xFF01, 0xFF5F)},
+        "\u3000": " ",
+        "\u200b": "",
+        "\ufeff": "",
+        "“": '"',
+        "”": '"',
+        "„": '"',
+        "‘": "'",
+        "’": "'",
+        "―": "-",
+        "─": "-",
+        "—": "-",
+        "–": "-",
+        "…": "...",
+        "⋯": "...",
+    }
+)
+
+_stop_words = frozenset()
+
+
+def load_stop_words(path=STOP_WORDS_PATH) -> frozenset[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return frozenset(line.strip() for line in f if line.strip())
+
+
+def set_stop_words(stop_words):
+    global _stop_words
+    _stop_words = stop_words
+
+
+def split_paragraph(text: str) -> list[str]:
+    """Split a paragraph into normalized sentences, punctuation included."""
+    text = html.unescape(MARKUP.sub(" ", text))
+    text = unicodedata.normalize("NFC", text).translate(NORMALIZE)
+    text = WHITESPACE.sub(" ", HANJA_GLOSS.sub("", text)).strip()
+    return [sentence for sentence in SENTENCE_END.split(text) if sentence]
+
+
+def tokenize(sentence: str) -> list[str]:
+    """Words of a sentence without their punctuation, stop words included."""
+    return [
+        token
+        for token in (
+            token.strip(EDGES) for token in PUNCTUATION.sub("", sentence).split()
+        )
+        if token
+    ]
+
+
+def clean_paragraph(text: str, stop_words=None) -> list[str]:
+    """Split a paragraph into cleaned sentences, without stop words."""
+    return clean_chunk((None, [text]), stop_words)[1]
+
+
+def clean_chunk(chunk, stop_words=None):
+    """(index, cleaned sentences, sentences) of a chunk of paragraphs.
+
+    The sentences keep their punctuation and stop words, for display and
+    word counts; only those with at least one word are kept.
+    """
+    stop_words = _stop_words if stop_words is None else stop_words
+    index, paragraphs = chunk
+    cleaned, sentences = [], []
+    for paragraph in paragraphs:
+        for sentence in split_paragraph(paragraph):
+            tokens = tokenize(sentence)
+            if not tokens:
+                continue
+            sentences.append(sentence)
+            tokens = [token for token in tokens if token not in stop_words]
+            if tokens:
+                cleaned.append(" ".join(tokens))
+    return index, cleaned, sentences
+
+
+def read_paragraphs(path, max_lines=200):
+    """Yield the paragraphs of a text file, one at a time.
+
+    Novels written by older versions of wikisource.py wrap each paragraph
+    over several lines between <p> and </p>; plain text has one paragraph
+    per line.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        lines = []
+        for line in f:
+            lines.append(line)
+            if "<p" in lines[0] and "</p>" not in line and len(lines) < max_lines:
+                continue
+            yield "".join(lines)
+            lines = []
+        if lines:
+            yield "".join(lines)
+
+
+def read_lyrics(path):
+    """Yield every lyric line of data/lyrics.jsonl."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield from json.loads(line)["lyrics"]
+
+
+def list_sources(data_dir=DATA_DIR):
+    """(input path, output name, reader) of every corpus found in ``data_dir``."""
+    sources = [
+        (path, f"{os.path.basename(path)}_cleaned.txt", read_paragraphs)
+        for path in sorted(glob.glob(os.path.join(data_dir, "novels", "*.txt")))
+    ]
+    for name, reader in (
+        ("lyrics.jsonl", read_lyrics),
+        ("korean_texts.txt", read_paragraphs),
+    ):
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            output = f"{os.path.splitext(name)[0]}_cleaned.txt"
+            sources.append((path, output, reader))
+    return sources
+
+
+def sentences_name(output):
+    """Name of the file of the sentences behind a cleaned output."""
+    return output.removesuffix("_cleaned.txt") + "_sentences.txt"
+
+
+def content_hash(path, salt=""):
+    digest = hashlib.sha256(salt.encode("utf-8"))
+    with open(path, "rb") as f:
+        while block := f.read(1 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _chunks(sources, chunk_size):
+    # Every source yields at least one (possibly empty) chunk so that an
+    # empty input still gets its output file.
+    for index, (path, _, reader) in enumerate(sources):
+        paragraphs = reader(path)
+        chunk = list(islice(paragraphs, chunk_size))
+        yield index, chunk
+        while chunk := list(islice(paragraphs, chunk_size)):
+            yield index, chunk
+
+
+def clean_corpus(
+    sources=None,
+    output_dir=CLEANED_DIR,
+    stop_words_path=STOP_WORDS_PATH,
+    workers=None,
+    chunk_size=256,
+    force=False,
+):
+    """Write the cleaned sentences of every source to ``output_dir``.
+
+    Paragraphs are read lazily and cleaned in chunks on a process pool; a
+    single writer stores one sentence per line, in input order, in
+    ``<name>_cleaned.txt`` and, as written in the source (punctuation and
+    stop words kept), in ``<name>_sentences.txt``. Sources
+    whose content (and stop words) hashed the same as in the last run are
+    skipped unless ``force`` is set. Returns the number of written sentences.
+    """
+    start_time = time.time()
+    sources = list_sources() if sources is None else sources
+    stop_words = load_stop_words(stop_words_path)
+    salt = f"{CLEANER_VERSION}:{'|'.join(sorted(stop_words))}"
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, ".manifest.json")
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+
+    todo = []
+    hashes = []
+    for path, output, reader in sources:
+        digest = content_hash(path, salt)
+        if (
+            not force
+            and manifest.get(output) == digest
+            and os.path.exists(os.path.join(output_dir, output))
+            and os.path.exists(os.path.join(output_dir, sentences_name(output)))
+        ):
+            continue
+        todo.append((path, output, reader))
+        hashes.append(digest)
+    logging.info(
+        f"Cleaning {len(todo)} sources ({len(sources) - len(todo)} unchanged)."
+    )
+
+    written = 0
+    current, files = None, None
+
+    def finish():
+        output = todo[current][1]
+        for file, name in zip(files, (output, sentences_name(output))):
+            file.close()
+            output_path = os.path.join(output_dir, name)
+            os.replace(output_path + ".tmp", output_path)
+        manifest[output] = hashes[current]
+
+    with multiprocessing.Pool(
+        workers, initializer=set_stop_words, initargs=(stop_words,)
+    ) as pool:
+        for index, *lines in pool.imap(clean_chunk, _chunks(todo, chunk_size)):
+            if index != current:
+                if files is not None:
+                    finish()
+                current = index
+                output = todo[index][1]
+                files = [
+                    open(
+                        os.path.join(output_dir, name) + ".tmp", "w", encoding="utf-8"
+                    )
+                    for name in (output, sentences_name(output))
+                ]
+            for file, sentences in zip(files, lines):
+                if sentences:
+                    file.write("\n".join(sentences) + "\n")
+            written += len(lines[0])
+        if files is not None:
+            finish()
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    duration = time.time() - start_time
+    logging.info(
+        f"Wrote {written} sentences from {len(todo)} sources in {duration:.2f}s "
+        f"({written / max(duration, 1e-9):.0f} sentences/sec)."
+    )
+    return written
+
+
+def read_sentences(pattern=os.path.join(CLEANED_DIR, "*_cleaned.txt")):
+    """Yield the sentences of the cleaned corpus, one per line.
+
+    Use ``*_sentences.txt`` as ``pattern`` for the sentences as written.
+    """
+    for path in sorted(glob.glob(pattern)):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield line.rstrip("\n")
+
+
+if __name__ == "__main__":
+    clean_corpus()
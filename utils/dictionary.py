@@ -1,18 +1,32 @@
 from dotenv import load_dotenv
 import os
 import logging
+import asyncio
+import time
+import aiohttp
 import requests
-import bs4
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from utils.cache import cached, get_cache
+from utils.extract import parse_krdict_word, parse_krdict_example
 
 logging.basicConfig(level=logging.INFO)
 load_dotenv()
 
 KOREAN_DICT_API_KEY = os.getenv("KOREAN_DICT_API_KEY")
 KOREAN_DICT_MAIN_URL = "https://krdict.korean.go.kr/api/search"  # 50_000 tokens/day
+KOREAN_DICT_DAILY_QUOTA = 50_000
+# Politeness limit in requests per second; the daily quota is enforced apart.
+KOREAN_DICT_RATE = float(os.getenv("KOREAN_DICT_RATE", "10"))
+# krdict counts its quota per day in Korea (UTC+9).
+KOREAN_DICT_UTC_OFFSET = 9 * 3600
 
 
+class QuotaExceeded(RuntimeError):
+    pass
+
+
+@cached("krdict.word", ignore=("API_KEY", "url"))
 def search_word_in_dictionary(word, API_KEY, url):
     params = {
         "key": API_KEY,
@@ -37,42 +51,7 @@ def search_word_in_dictionary(word, API_KEY, url):
         session.mount("https://", adapter)
         session.mount("http://", adapter)
         response = session.get(request_url)
-        soup = bs4.BeautifulSoup(response.text, "xml")
-        trans_dfn_soup = soup.find("trans_dfn")
-        definition_soup = soup.find("definition")
-        pos_soup = soup.find("pos")
-        target_code_soup = soup.find("target_code")
-        trans_word_soup = soup.find("trans_word")
-
-        if trans_dfn_soup is not None:
-            definition = trans_dfn_soup.get_text()
-        elif definition_soup is not None:
-            definition = definition_soup.get_text()
-        else:
-            definition = ""
-
-        if pos_soup is not None:
-            pos = soup.find("pos").get_text()
-        else:
-            pos = ""
-
-        if target_code_soup is not None:
-            target_code = soup.find("target_code").get_text()
-        else:
-            target_code = ""
-
-        if trans_word_soup is not None:
-            trans_word = soup.find("trans_word").get_text()
-        else:
-            trans_word = ""
-
-        data = {
-            "word": word,
-            "definition": definition,
-            "pos": pos,
-            "target_code": target_code,
-            "trans_word": trans_word,
-        }
+        data = parse_krdict_word(response.text, word)
 
         return data
     except Exception as e:
@@ -80,6 +59,7 @@ def search_word_in_dictionary(word, API_KEY, url):
     return None
 
 
+@cached("krdict.exam", ignore=("API_KEY", "url"))
 def search_example(word, API_KEY, url):
     params = {
         "key": API_KEY,
@@ -101,14 +81,117 @@ def search_example(word, API_KEY, url):
         session.mount("https://", adapter)
         session.mount("http://", adapter)
         response = session.get(request_url)
-        soup = bs4.BeautifulSoup(response.text, "xml")
-        example_soup = soup.find("example")
-
-        if example_soup is not None:
-            example = example_soup.get_text()
-        else:
-            example = "..."
+        example = parse_krdict_example(response.text)
         return example
     except Exception as e:
         logging.exception(str(e))
     return None
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class DictionaryClient:
+    """Async krdict client sharing one pooled session for every lookup.
+
+    Requests are limited by ``concurrency`` in flight and by a token bucket
+    of ``rate`` requests per second, with bursts of ``burst`` requests
+    (``concurrency`` by default). Requests of the day are counted in the
+    response cache, so the ``daily_quota`` holds across restarts: once it
+    is spent, lookups raise QuotaExceeded.
+    ``url`` can point to a local stub server serving canned XML.
+    """
+
+    def __init__(
+        self,
+        api_key=KOREAN_DICT_API_KEY,
+        url=KOREAN_DICT_MAIN_URL,
+        concurrency=8,
+        daily_quota=KOREAN_DICT_DAILY_QUOTA,
+        rate=KOREAN_DICT_RATE,
+        burst=None,
+        retries=3,
+    ):
+        self.api_key = api_key
+        self.url = url
+        self.concurrency = concurrency
+        self.daily_quota = daily_quota
+        self.retries = retries
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = TokenBucket(rate, burst or concurrency)
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        self.session = aiohttp.ClientSession(connector=connector)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def _get(self, params):
+        params = {"key": self.api_key, **params}
+        for attempt in range(self.retries):
+            await self.limiter.acquire()
+            day = time.strftime(
+                "%Y-%m-%d", time.gmtime(time.time() + KOREAN_DICT_UTC_OFFSET)
+            )
+            if not get_cache().spend("krdict", day, self.daily_quota):
+                raise QuotaExceeded(
+                    f"krdict daily quota of {self.daily_quota} requests spent for {day}"
+                )
+            async with self.semaphore:
+                try:
+                    async with self.session.get(self.url, params=params) as response:
+                        if response.status not in (502, 503, 504):
+                            response.raise_for_status()
+                            return await response.text()
+                except aiohttp.ClientError as e:
+                    logging.warning(f"krdict request failed: {e}")
+            if attempt < self.retries - 1:
+                # ⏳ Temps d’attente croissant (1s, 2s, 4s, etc.)
+                await asyncio.sleep(2**attempt)
+        return None
+
+    @cached("krdict.word")
+    async def search_word(self, word):
+        text = await self._get(
+            {"q": word, "translated": "y", "trans_lang": "1", "part": "word"}
+        )
+        if text is None:
+            return None
+        return parse_krdict_word(text, word)
+
+    @cached("krdict.exam")
+    async def search_example(self, word):
+        text = await self._get({"q": word, "part": "exam"})
+        if text is None:
+            return None
+        return parse_krdict_example(text)
+
+    async def lookup(self, word):
+        return await asyncio.gather(self.search_word(word), self.search_example(word))
+
+    async def lookup_many(self, words):
+        return await asyncio.gather(*(self.lookup(word) for word in words))
@@ -0,0 +1,187 @@
+from dotenv import load_dotenv
+import os
+import glob
+import math
+import time
+import sqlite3
+import logging
+from utils.corpus import CLEANED_DIR, tokenize
+from utils.hangul import HANGUL, noun_forms, predicate_forms
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO)
+
+PATH_TO_EXAMPLES = os.getenv("PATH_TO_EXAMPLES", "data/examples.sqlite3")
+
+# Sentences outside this range make poor examples and are not indexed.
+MIN_TOKENS = 3
+MAX_TOKENS = 30
+IDEAL_TOKENS = 8
+# Rank points per token away from IDEAL_TOKENS, against difficulty points.
+LENGTH_WEIGHT = 0.5
+POSTINGS_PER_TERM = 32
+
+# krdict parts of speech, and the classifications of the TOPIK list.
+PREDICATE_POS = ("동사", "형용사", "verb", "adjective")
+
+
+def query_terms(word: str, pos: str = None) -> list[list[str]]:
+    """Groups of tokens to look up for a dictionary word, likeliest first.
+
+    A noun is found alone or followed by a particle ("사랑", "사랑을"), a
+    verb or adjective by the conjugations of its stem ("먹었다"). Without
+    a part of speech, a word ending in 다 is tried as a noun first.
+    """
+    word = word.strip()
+    if not HANGUL.fullmatch(word):
+        return [[word.lower()]]
+    nouns = noun_forms(word)
+    if len(word) < 2 or not word.endswith("다"):
+        return [nouns]
+    predicates = predicate_forms(word[:-1])
+    if pos is None:
+        return [nouns, predicates]
+    return [predicates] if pos.endswith(PREDICATE_POS) else [nouns]
+
+
+def rank(length: int, difficulty: float) -> int:
+    return round(100 * (difficulty + LENGTH_WEIGHT * abs(length - IDEAL_TOKENS)))
+
+
+def _read_corpus(pattern):
+    for path in sorted(glob.glob(pattern)):
+        source = os.path.basename(path).removesuffix("_sentences.txt")
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                tokens = [token.lower() for token in tokenize(line)]
+                if MIN_TOKENS <= len(tokens) <= MAX_TOKENS:
+                    yield source, line.strip(), tokens
+
+
+def build_index(
+    path=PATH_TO_EXAMPLES,
+    pattern=os.path.join(CLEANED_DIR, "*_sentences.txt"),
+    postings_per_term=POSTINGS_PER_TERM,
+    batch_size=10_000,
+):
+    """Build the example index of the corpus sentences into ``path``.
+
+    Sentences are stored as written in the source, and found under their
+    words without punctuation (stop words included). A first pass counts tokens, so that the difficulty of a sentence is the
+    mean rarity (-log frequency) of its tokens. The second pass stores the
+    sentences and their postings (one per distinct token), and only the
+    ``postings_per_term`` best ranked sentences of every term are kept, in
+    a table clustered on (term, rank) so that looking up a word form is a
+    single short index range scan.
+    """
+    start_time = time.time()
+    counts = {}
+    total = 0
+    for _, _, tokens in _read_corpus(pattern):
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        total += len(tokens)
+
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    connection.execute("PRAGMA journal_mode=OFF")
+    connection.execute("PRAGMA synchronous=OFF")
+    connection.execute(
+        "CREATE TABLE sentences (id INTEGER PRIMARY KEY, text TEXT NOT NULL, source TEXT NOT NULL, length INTEGER NOT NULL, difficulty REAL NOT NULL)"
+    )
+    connection.execute(
+        "CREATE TEMP TABLE all_postings (term TEXT NOT NULL, rank INTEGER NOT NULL, sentence_id INTEGER NOT NULL)"
+    )
+
+    sentences = []
+    postings = []
+
+    def flush():
+        connection.executemany(
+            "INSERT INTO sentences (id, text, source, length, difficulty) VALUES (?, ?, ?, ?, ?)",
+            sentences,
+        )
+        connection.executemany(
+            "INSERT INTO all_postings (term, rank, sentence_id) VALUES (?, ?, ?)",
+            postings,
+        )
+        sentences.clear()
+        postings.clear()
+
+    seen = set()
+    with connection:
+        for source, text, tokens in _read_corpus(pattern):
+            if text in seen:
+                continue
+            seen.add(text)
+            sentence_id = len(seen)
+            difficulty = sum(math.log(total / counts[token]) for token in tokens)
+            difficulty /= len(tokens)
+            sentence_rank = rank(len(tokens), difficulty)
+            sentences.append((sentence_id, text, source, len(tokens), difficulty))
+            postings.extend((term, sentence_rank, sentence_id) for term in set(tokens))
+            if len(postings) >= batch_size:
+                flush()
+        flush()
+
+        connection.execute(
+            "CREATE TABLE postings (term TEXT NOT NULL, rank INTEGER NOT NULL, sentence_id INTEGER NOT NULL, PRIMARY KEY (term, rank, sentence_id)) WITHOUT ROWID"
+        )
+        connection.execute(
+            "INSERT INTO postings SELECT term, rank, sentence_id FROM (SELECT term, rank, sentence_id, ROW_NUMBER() OVER (PARTITION BY term ORDER BY rank, sentence_id) AS position FROM all_postings) WHERE position <= ?",
+            (postings_per_term,),
+        )
+        connection.execute("DROP TABLE all_postings")
+        # Only keep the sentences some term still points to.
+        connection.execute(
+            "DELETE FROM sentences WHERE id NOT IN (SELECT sentence_id FROM postings)"
+        )
+    connection.execute("VACUUM")
+    (indexed,) = connection.execute("SELECT COUNT(*) FROM sentences").fetchone()
+    (terms,) = connection.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()
+    connection.close()
+    os.replace(tmp_path, path)
+
+    duration = time.time() - start_time
+    logging.info(
+        f"Indexed {indexed} of {len(seen)} sentences under {terms} terms in {duration:.2f}s."
+    )
+    return indexed
+
+
+class ExampleIndex:
+    """Read-only lookups of example sentences built by ``build_index``.
+
+    Sentences come back easiest first: short sentences close to
+    IDEAL_TOKENS tokens, made of frequent words.
+    """
+
+    def __init__(self, path=PATH_TO_EXAMPLES):
+        self.connection = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+
+    def search(self, word, pos=None, limit=5, max_length=MAX_TOKENS):
+        for terms in query_terms(word, pos):
+            placeholders = ", ".join("?" * len(terms))
+            rows = self.connection.execute(
+                f"SELECT DISTINCT postings.rank, postings.sentence_id, sentences.text FROM postings JOIN sentences ON sentences.id = postings.sentence_id WHERE postings.term IN ({placeholders}) AND sentences.length <= ? ORDER BY postings.rank, postings.sentence_id LIMIT ?",
+                (*terms, max_length, limit),
+            ).fetchall()
+            if rows:
+                return [text for _, _, text in rows]
+        return []
+
+    def example(self, word, pos=None):
+        """The best example of ``word``, or "..." like the krdict parser."""
+        examples = self.search(word, pos, limit=1)
+        return examples[0] if examples else "..."
+
+    def close(self):
+        self.connection.close()
+
+
+if __name__ == "__main__":
+    build_index()
@@ -0,0 +1,142 @@
+import logging
+from lxml import etree, html
+
+# Targeted extraction of the few nodes each provider needs, with lxml and
+# XPath expressions compiled once at import.
+
+
+def has_class(name: str) -> str:
+    # Same semantics as BeautifulSoup's {"class": name}: a single class
+    # matches any of the element's classes, several must match exactly.
+    if " " in name:
+        return f"@class='{name}'"
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+WIKTIONARY_CONTENT = etree.XPath(
+    f"//div[{has_class('mw-content-ltr mw-parser-output')}]"
+)
+WIKTIONARY_ITEMS = etree.XPath("(.//ol)[1]//li")
+GLOSBE_CONTENT = etree.XPath(f"//section[{has_class('bg-white px-1')}]")
+GLOSBE_ITEMS = etree.XPath(f"(.//ul[{has_class('pr-1')}])[1]//li")
+DAUM_CONTENT = etree.XPath(f"//div[{has_class('search_cont')}]")
+DAUM_CARDS = etree.XPath(f".//div[{has_class('card_word')}]")
+DAUM_ITEMS = etree.XPath(f"(.//div[{has_class('search_type kuke_type')}])[1]//li")
+DAUM_TEXT = etree.XPath(f".//span[{has_class('txt_search')}]")
+WORDREFERENCE_CONTENT = etree.XPath("//td[@id='centercolumn']")
+WORDREFERENCE_ITEMS = etree.XPath(
+    f"(.//table[{has_class('WRD')}])[1]//td[{has_class('FrWrd')}]"
+)
+FIRST_TAG = {
+    tag: etree.XPath(f"(//{tag})[1]")
+    for tag in ("trans_dfn", "definition", "pos", "target_code", "trans_word", "example")
+}
+
+
+def subtree(text: str, marker: str):
+    """Parse ``text`` from the tag containing ``marker`` onwards, or None.
+
+    Skipping everything before the container (head, scripts, navigation)
+    is where most of the parse time of these pages goes.
+    """
+    index = text.find(marker)
+    if index < 0:
+        return None
+    start = text.rfind("<", 0, index)
+    return html.fromstring(text[start:])
+
+
+def first(xpath, node):
+    nodes = xpath(node)
+    return nodes[0] if nodes else None
+
+
+def parse_wiktionary(text: str) -> list[str]:
+    root = subtree(text, "mw-parser-output")
+    page_content = first(WIKTIONARY_CONTENT, root) if root is not None else None
+
+    if page_content is None:
+        logging.warning("Could not find page content.")
+        return None
+
+    translations = []
+    for li in WIKTIONARY_ITEMS(page_content):
+        dl_tag = li.find(".//dl")
+        if dl_tag is not None:
+            dl_tag.drop_tree()
+        translations.append(li.text_content())
+    return translations
+
+
+def parse_Glosbe(text: str) -> list[str]:
+    root = subtree(text, "bg-white px-1")
+    page_content = first(GLOSBE_CONTENT, root) if root is not None else None
+
+    if page_content is None:
+        logging.warning("Could not find page content.")
+        return None
+
+    translations = []
+    for li in GLOSBE_ITEMS(page_content):
+        h3 = li.find(".//h3")
+        if h3 is not None:
+            translations.append(h3.text_content())
+    return translations
+
+
+def parse_Daum(text: str) -> list[str]:
+    root = subtree(text, "search_cont")
+    page_content = first(DAUM_CONTENT, root) if root is not None else None
+
+    if page_content is None:
+        logging.warning("Could not find page content.")
+        return None
+
+    translations = []
+    table_translation = DAUM_CARDS(page_content)[1]
+    for li in DAUM_ITEMS(table_translation):
+        text_span = first(DAUM_TEXT, li)
+        if text_span is not None:
+            translations.append(text_span.text_content())
+    return translations
+
+
+def parse_wordreference(text: str) -> list[str]:
+    root = subtree(text, "centercolumn")
+    page_content = first(WORDREFERENCE_CONTENT, root) if root is not None else None
+
+    if page_content is None:
+        logging.warning("Could not find page content.")
+        return None
+
+    return [td.text_content() for td in WORDREFERENCE_ITEMS(page_content)[1:]]
+
+
+def parse_krdict(text: str):
+    parser = etree.XMLParser(recover=True, resolve_entities=False)
+    return etree.fromstring(text.encode("utf-8"), parser)
+
+
+def tag_text(root, tag: str):
+    node = first(FIRST_TAG[tag], root) if root is not None else None
+    return "".join(node.itertext()) if node is not None else None
+
+
+def parse_krdict_word(text: str, word: str) -> dict[str, str]:
+    root = parse_krdict(text)
+    definition = tag_text(root, "trans_dfn")
+    if definition is None:
+        definition = tag_text(root, "definition")
+
+    return {
+        "word": word,
+        "definition": definition or "",
+        "pos": tag_text(root, "pos") or "",
+        "target_code": tag_text(root, "target_code") or "",
+        "trans_word": tag_text(root, "trans_word") or "",
+    }
+
+
+def parse_krdict_example(text: str) -> str:
+    example = tag_text(parse_krdict(text), "example")
+    return example if example is not None else "..."
@@ -0,0 +1,211 @@
+from dotenv import load_dotenv
+import os
+import glob
+import time
+import sqlite3
+import hashlib
+import logging
+from collections import Counter
+import pandas as pd
+from utils.corpus import CLEANED_DIR, DATA_DIR, tokenize
+from utils.examples import query_terms
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO)
+
+PATH_TO_FREQUENCIES = os.getenv("PATH_TO_FREQUENCIES", "data/frequencies.sqlite3")
+TOPIK_PATH = os.path.join(DATA_DIR, "Korean_vocabular_TOPIK.xlsx")
+
+
+def prefix_hash(path, size):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while size > 0:
+            block = f.read(min(size, 1 << 20))
+            if not block:
+                break
+            digest.update(block)
+            size -= len(block)
+    return digest.hexdigest()
+
+
+def count_tokens(path, start=0):
+    """Token counts of the lines of ``path`` from byte ``start`` onwards.
+
+    Tokens are lowercased words without punctuation, as in the example index.
+    """
+    counts = Counter()
+    with open(path, "rb") as f:
+        f.seek(start)
+        for line in f:
+            counts.update(token.lower() for token in tokenize(line.decode("utf-8")))
+    return counts
+
+
+class FrequencyIndex:
+    """Token counts of the corpus sentences, per source and in total.
+
+    Stop words are counted too. Each source (a sentences file of
+    data/cleaned) remembers how many bytes were
+    counted and the hash of that prefix. When a source grew, only the new
+    lines are counted and merged; when it was rewritten, its previous counts
+    are subtracted before recounting it. Ranks are materialized after each
+    update, so top-N, rank and frequency queries are index lookups.
+    """
+
+    def __init__(self, path=PATH_TO_FREQUENCIES):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sources (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, position INTEGER NOT NULL, hash TEXT NOT NULL, tokens INTEGER NOT NULL, updated REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS counts (source_id INTEGER NOT NULL, term TEXT NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (source_id, term)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS totals (term TEXT PRIMARY KEY, count INTEGER NOT NULL, rank INTEGER) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_totals_rank ON totals(rank);
+            """
+        )
+
+    def _merge(self, source_id, counts, sign=1):
+        self.connection.executemany(
+            "INSERT INTO counts (source_id, term, count) VALUES (?, ?, ?) ON CONFLICT (source_id, term) DO UPDATE SET count = count + excluded.count",
+            ((source_id, term, sign * count) for term, count in counts.items()),
+        )
+        self.connection.executemany(
+            "INSERT INTO totals (term, count) VALUES (?, ?) ON CONFLICT (term) DO UPDATE SET count = count + excluded.count",
+            ((term, sign * count) for term, count in counts.items()),
+        )
+
+    def _remove(self, source_id):
+        self.connection.execute(
+            "UPDATE totals SET count = count - (SELECT count FROM counts WHERE counts.source_id = ? AND counts.term = totals.term) WHERE term IN (SELECT term FROM counts WHERE source_id = ?)",
+            (source_id, source_id),
+        )
+        self.connection.execute("DELETE FROM counts WHERE source_id = ?", (source_id,))
+
+    def update_source(self, name, path):
+        """Count what changed in ``path`` since the last update of ``name``.
+
+        Returns the number of newly counted tokens.
+        """
+        size = os.path.getsize(path)
+        row = self.connection.execute(
+            "SELECT id, position, hash FROM sources WHERE name = ?", (name,)
+        ).fetchone()
+        start = 0
+        with self.connection:
+            if row is None:
+                source_id = self.connection.execute(
+                    "INSERT INTO sources (name, position, hash, tokens, updated) VALUES (?, 0, '', 0, ?)",
+                    (name, time.time()),
+                ).lastrowid
+            else:
+                source_id, position, digest = row
+                if position == size and prefix_hash(path, size) == digest:
+                    return 0
+                if position < size and prefix_hash(path, position) == digest:
+                    start = position
+                else:
+                    self._remove(source_id)
+                    self.connection.execute(
+                        "UPDATE sources SET tokens = 0 WHERE id = ?", (source_id,)
+                    )
+
+            counts = count_tokens(path, start)
+            self._merge(source_id, counts)
+            tokens = sum(counts.values())
+            self.connection.execute(
+                "UPDATE sources SET position = ?, hash = ?, tokens = tokens + ?, updated = ? WHERE id = ?",
+                (size, prefix_hash(path, size), tokens, time.time(), source_id),
+            )
+        return tokens
+
+    def update(self, pattern=os.path.join(CLEANED_DIR, "*_sentences.txt")):
+        """Merge every sentences file into the index, then refresh the ranks."""
+        start_time = time.time()
+        tokens = 0
+        for path in sorted(glob.glob(pattern)):
+            name = os.path.basename(path).removesuffix("_sentences.txt")
+            tokens += self.update_source(name, path)
+        if tokens:
+            self.refresh_ranks()
+        duration = time.time() - start_time
+        logging.info(f"Counted {tokens} new tokens in {duration:.2f}s.")
+        return tokens
+
+    def refresh_ranks(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM totals WHERE count <= 0")
+            self.connection.execute(
+                "UPDATE totals SET rank = ranked.rank FROM (SELECT term, RANK() OVER (ORDER BY count DESC) AS rank FROM totals) AS ranked WHERE totals.term = ranked.term"
+            )
+
+    def top(self, n=100, source=None):
+        """The ``n`` most frequent tokens, overall or in one source."""
+        if source is None:
+            return self.connection.execute(
+                "SELECT term, count FROM totals ORDER BY rank LIMIT ?", (n,)
+            ).fetchall()
+        return self.connection.execute(
+            "SELECT term, count FROM counts JOIN sources ON sources.id = counts.source_id WHERE sources.name = ? ORDER BY count DESC LIMIT ?",
+            (source, n),
+        ).fetchall()
+
+    def rank(self, term):
+        row = self.connection.execute(
+            "SELECT rank FROM totals WHERE term = ?", (term,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def count(self, term):
+        row = self.connection.execute(
+            "SELECT count FROM totals WHERE term = ?", (term,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def forms_count(self, terms):
+        placeholders = ", ".join("?" * len(terms))
+        (count,) = self.connection.execute(
+            f"SELECT COALESCE(SUM(count), 0) FROM totals WHERE term IN ({placeholders})",
+            terms,
+        ).fetchone()
+        return count
+
+    def frequency(self, word, pos=None):
+        """Occurrences of a dictionary word, particles and endings included.
+
+        Like the example index, a noun counts the eojeols made of it and a
+        particle, and a verb or adjective the conjugations of its stem, so
+        that 가다 does not count 가슴 or 가만히.
+        """
+        for terms in query_terms(word, pos):
+            count = self.forms_count(terms)
+            if count:
+                return count
+        return 0
+
+    def topik_report(self, path=TOPIK_PATH):
+        """TOPIK words sorted by corpus frequency, most frequent first."""
+        vocabulary = pd.read_excel(
+            path, usecols=["Frequency Rank", "Word", "Classification", "English"]
+        )
+        vocabulary["corpus_count"] = [
+            self.frequency(word, pos if isinstance(pos, str) else None)
+            for word, pos in zip(vocabulary["Word"], vocabulary["Classification"])
+        ]
+        vocabulary["corpus_rank"] = vocabulary["corpus_count"].rank(
+            ascending=False, method="min"
+        ).astype(int)
+        covered = (vocabulary["corpus_count"] > 0).mean()
+        logging.info(f"{covered:.1%} of the TOPIK words occur in the corpus.")
+        return vocabulary.sort_values(
+            ["corpus_count", "Frequency Rank"], ascending=[False, True]
+        ).reset_index(drop=True)
+
+    def close(self):
+        self.connection.close()
+
+
+if __name__ == "__main__":
+    index = FrequencyIndex()
+    index.update()
+    print(index.topik_report().head(50).to_string())
+    index.close()
@@ -1,5 +1,10 @@
+import os
 import json
-from typing import TypedDict, NotRequired
+import multiprocessing
+from collections import Counter
+from itertools import islice
+from functools import cached_property, lru_cache, partial
+from typing import Callable, Iterable, Iterator, TypedDict, NotRequired
 
 
 class Conditions(TypedDict):
@@ -30,117 +35,366 @@ class SyntacticGroup(TypedDict):
     priority: int
 
 
-with open("data/grammar/josa.json", "r") as f:
-    josa = json.load(f)
+class SentenceAnalysis(TypedDict):
+    tokens: list[tuple[str, str, Role]]
+    groups: list[SyntacticGroup]
 
-with open("data/grammar/korean_syntactic_grouping_rules.json", "r") as f:
-    rules = json.load(f)
 
-with open("data/grammar/korean_pos_tags.json", "r") as f:
-    pos_tags = json.load(f)
+JOSA_POS = frozenset(["JX", "JC", "JKQ", "JKV", "JKB", "JKO", "JKG", "JKC", "JKS"])
 
+GRAMMAR_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "grammar"
+)
 
-def evaluate_conditions(word: str, role: str, type: str, matches: list[str]) -> bool:
-    if role == "negation":
-        condition_template = f"'{word + '다'}'%'match'"
-    else:
-        condition_template = f"'{word}'%'match'"
-    if type == "=":
-        condition_template = condition_template.replace("%", "==")
-    elif type == "end":
-        condition_template = condition_template.replace("%", ".endswith(") + ")"
-
-    for match in matches:
-        condition = condition_template.replace("match", match)
-        if eval(condition):
-            return True
+
+class GrammarResources:
+    """Grammar JSON resources, each loaded on first access and then kept.
+
+    Instances are picklable with whatever has been loaded so far, so a
+    ``preload()``-ed instance can be handed to worker processes (see
+    ``set_resources``) instead of every worker re-reading the files.
+    """
+
+    def __init__(self, directory: str = GRAMMAR_DIR):
+        self.directory = directory
+
+    def _load(self, filename: str):
+        with open(os.path.join(self.directory, filename), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @cached_property
+    def josa(self) -> dict[str, dict[str, str]]:
+        return self._load("josa.json")
+
+    @cached_property
+    def josa_index(self) -> dict[str, dict[str, str]]:
+        # "이/가" -> {"이": info, "가": info}, so lookups match whole forms.
+        index = dict()
+        for key, info in self.josa.items():
+            for form in key.split("/"):
+                index.setdefault(form, info)
+        return index
+
+    @cached_property
+    def rules(self) -> list[Rules]:
+        return self._load("korean_syntactic_grouping_rules.json")
+
+    @cached_property
+    def pos_tags(self) -> dict[str, Role]:
+        return self._load("korean_pos_tags.json")
+
+    @cached_property
+    def verbal_endings(self) -> dict[str, dict[str, str]]:
+        return self._load("korean_verbal_endings.json")
+
+    @cached_property
+    def compiled_rules(self) -> "CompiledRules":
+        return CompiledRules(self.rules)
+
+    def preload(self) -> "GrammarResources":
+        for name in (
+            "josa",
+            "josa_index",
+            "rules",
+            "pos_tags",
+            "verbal_endings",
+            "compiled_rules",
+        ):
+            getattr(self, name)
+        return self
+
+
+_resources = None
+
+
+def get_resources() -> GrammarResources:
+    global _resources
+    if _resources is None:
+        _resources = GrammarResources()
+    return _resources
+
+
+def set_resources(resources: GrammarResources) -> None:
+    global _resources
+    _resources = resources
+
+
+def __getattr__(name: str):
+    # Backwards compatible module attributes, loaded on first access.
+    if name in ("josa", "rules", "pos_tags", "verbal_endings"):
+        return getattr(get_resources(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _matches_equal(suffix: str, matches: frozenset[str], word: str) -> bool:
+    return word + suffix in matches
+
+
+def _matches_end(suffix: str, matches: tuple[str, ...], word: str) -> bool:
+    return (word + suffix).endswith(matches)
+
+
+def _matches_nothing(word: str) -> bool:
     return False
 
 
+@lru_cache(maxsize=None)
+def compile_condition(
+    role: str, type: str, matches: tuple[str, ...]
+) -> Callable[[str], bool]:
+    # Negation rules match on the dictionary form (stem + 다). Predicates are
+    # partials of module-level functions so compiled rules stay picklable.
+    suffix = "다" if role == "negation" else ""
+    if type == "=":
+        return partial(_matches_equal, suffix, frozenset(matches))
+    if type == "end":
+        return partial(_matches_end, suffix, matches)
+    return _matches_nothing
+
+
+def evaluate_conditions(word: str, role: str, type: str, matches: list[str]) -> bool:
+    return compile_condition(role, type, tuple(matches))(word)
+
+
 def grammatical_identification(
     tokens: list[tuple[str, str]],
 ) -> list[tuple[str, str, Role]]:
+    resources = get_resources()
+    pos_tags = resources.pos_tags
+    josa_index = resources.josa_index
     res = []
     for word, pos in tokens:
-        role = dict()
-        if pos in pos_tags:
-            role.update(pos_tags[pos])
-            # Josa, additional info
-            if pos in ["JX", "JC", "JKQ", "JKV", "JKB", "JKO", "JKG", "JKC", "JKS"]:
-                for key in josa:
-                    if word in key:
-                        role.update(josa[key])
-        else:
+        info = pos_tags.get(pos)
+        if info is None:
             role = None
+        else:
+            role = dict(info)
+            # Josa, additional info
+            if pos in JOSA_POS and word in josa_index:
+                role.update(josa_index[word])
         res.append((word, pos, role))
     return res
 
 
-def syntactic_grouping(
-    tokens: list[tuple[str, str]], rules: Rules
-) -> list[SyntacticGroup]:
-    syntactic_groups = []
-    sorted_rules = sorted(rules, key=lambda r: r["priority"])
-    used_indices = set()
+class CompiledRules:
+    """Grouping rules compiled into a trie over POS tags.
 
-    for rule in sorted_rules:
-        if "conditions" in rule:
-            conditions = rule["conditions"]
-        else:
-            conditions = None
-        for pattern in rule["patterns"]:
-            window_size = len(pattern)
-            for i in range(len(tokens) - window_size + 1):
-                if any((i + j) in used_indices for j in range(window_size)):
-                    continue
-                token_window = tokens[i : i + window_size]
-                pos_sequence = [pos for _, pos in token_window]
-
-                if pos_sequence == pattern:
-                    if conditions:
-                        for index, pos in enumerate(pos_sequence):
-                            if pos in conditions["on"] and evaluate_conditions(
-                                token_window[index][0],
-                                rule["role"],
-                                conditions["type"],
-                                conditions["matches"],
-                            ):
-                                syntactic_groups.append(
-                                    {
-                                        "span": token_window,
-                                        "role": rule["role"],
-                                        "description": rule["description"],
-                                        "priority": rule["priority"],
-                                    }
-                                )
-                                break
-                    else:
-                        syntactic_groups.append(
-                            {
-                                "span": token_window,
-                                "role": rule["role"],
-                                "description": rule["description"],
-                                "priority": rule["priority"],
-                            }
-                        )
-
-                    used_indices.update(range(i, i + window_size))
+    ``entries`` holds every (rule, pattern, condition) triple in priority
+    order, where ``condition`` is None or a pair of the POS tags it applies
+    to and its compiled predicate. Each trie node maps a POS tag to its child
+    node, with the ids of the patterns ending there stored under the ``None``
+    key.
+    """
+
+    def __init__(self, rules: list[Rules]):
+        self.entries = []
+        for rule in sorted(rules, key=lambda r: r["priority"]):
+            condition = None
+            if "conditions" in rule:
+                conditions = rule["conditions"]
+                condition = (
+                    frozenset(conditions["on"]),
+                    compile_condition(
+                        rule["role"], conditions["type"], tuple(conditions["matches"])
+                    ),
+                )
+            for pattern in rule["patterns"]:
+                self.entries.append((rule, pattern, condition))
+        self.trie = dict()
+        for entry_id, (_, pattern, _) in enumerate(self.entries):
+            node = self.trie
+            for pos in pattern:
+                node = node.setdefault(pos, dict())
+            node.setdefault(None, []).append(entry_id)
+
+    def find_occurrences(self, pos_sequence: list[str]) -> dict[int, list[int]]:
+        occurrences = dict()
+        for i in range(len(pos_sequence)):
+            node = self.trie
+            for pos in pos_sequence[i:]:
+                node = node.get(pos)
+                if node is None:
                     break
+                for entry_id in node.get(None, ()):
+                    occurrences.setdefault(entry_id, []).append(i)
+        return occurrences
+
+
+_compiled_rules = dict()
+
+
+def compile_rules(rules: list[Rules]) -> CompiledRules:
+    cached = _compiled_rules.get(id(rules))
+    if cached is None or cached[0] is not rules:
+        cached = (rules, CompiledRules(rules))
+        _compiled_rules[id(rules)] = cached
+    return cached[1]
+
+
+def _syntactic_grouping(
+    tokens: list[tuple[str, str]], compiled: CompiledRules
+) -> list[tuple[int, SyntacticGroup]]:
+    # Each (rule, pattern) pair claims at most its leftmost window that does not
+    # overlap a window claimed by an earlier pair, in priority order.
+    syntactic_groups = []
+    used_indices = [False] * len(tokens)
+    occurrences = compiled.find_occurrences([pos for _, pos in tokens])
+
+    for entry_id in sorted(occurrences):
+        rule, pattern, condition = compiled.entries[entry_id]
+        window_size = len(pattern)
+        for i in occurrences[entry_id]:
+            if any(used_indices[i : i + window_size]):
+                continue
+            token_window = tokens[i : i + window_size]
+
+            if condition is None or any(
+                pos in condition[0] and condition[1](word)
+                for word, pos in token_window
+            ):
+                syntactic_groups.append(
+                    (
+                        i,
+                        {
+                            "span": token_window,
+                            "role": rule["role"],
+                            "description": rule["description"],
+                            "priority": rule["priority"],
+                        },
+                    )
+                )
+
+            used_indices[i : i + window_size] = [True] * window_size
+            break
     return syntactic_groups
 
 
-tokens = [
-    ("학생", "NNG"),  # student
-    ("이", "JKS"),  # subject marker
-    ("학교", "NNG"),  # school
-    ("에", "JKB"),  # locative
-    ("가", "VV"),  # go
-    ("지", "EC"),  # connective
-    ("않", "VX"),  # negation
-    ("을", "EP"),  # pre-final ending
-    ("까요", "EF"),  # interrogative polite ending
-]
-
-results = syntactic_grouping(tokens, rules)
-for match in results:
-    print(f"{match['role'].upper()} → {[form for form, _ in match['span']]}")
+def syntactic_grouping(
+    tokens: list[tuple[str, str]], rules: Rules | None = None
+) -> list[SyntacticGroup]:
+    if rules is None:
+        compiled = get_resources().compiled_rules
+    elif isinstance(rules, CompiledRules):
+        compiled = rules
+    else:
+        compiled = compile_rules(rules)
+    return [group for _, group in _syntactic_grouping(tokens, compiled)]
+
+
+class CorpusStats:
+    """Aggregate counts over analyzed sentences, mergeable across workers.
+
+    ``unmatched_ngrams`` counts POS n-grams inside runs of tokens that no
+    syntactic group covers, to show which sequences the rules miss.
+    """
+
+    def __init__(self, ngram: int = 2):
+        self.ngram = ngram
+        self.sentences = 0
+        self.tokens = 0
+        self.roles = Counter()
+        self.patterns = Counter()
+        self.unmatched_ngrams = Counter()
+
+    def add(
+        self, tokens: list[tuple[str, str]], groups: list[tuple[int, SyntacticGroup]]
+    ) -> None:
+        self.sentences += 1
+        self.tokens += len(tokens)
+        covered = [False] * len(tokens)
+        for start, group in groups:
+            span = group["span"]
+            self.roles[group["role"]] += 1
+            self.patterns[(group["role"], " ".join(pos for _, pos in span))] += 1
+            covered[start : start + len(span)] = [True] * len(span)
+
+        run = []
+        for (_, pos), is_covered in zip(tokens + [("", "")], covered + [True]):
+            if not is_covered:
+                run.append(pos)
+                continue
+            for i in range(len(run) - self.ngram + 1):
+                self.unmatched_ngrams[" ".join(run[i : i + self.ngram])] += 1
+            run = []
+
+    def merge(self, other: "CorpusStats") -> None:
+        self.sentences += other.sentences
+        self.tokens += other.tokens
+        self.roles.update(other.roles)
+        self.patterns.update(other.patterns)
+        self.unmatched_ngrams.update(other.unmatched_ngrams)
+
+
+def _analyze_chunk(
+    sentences: list[list[tuple[str, str]]], ngram: int = 2
+) -> tuple[list[SentenceAnalysis], CorpusStats]:
+    compiled = get_resources().compiled_rules
+    stats = CorpusStats(ngram)
+    results = []
+    for tokens in sentences:
+        groups = _syntactic_grouping(tokens, compiled)
+        stats.add(tokens, groups)
+        results.append(
+            {
+                "tokens": grammatical_identification(tokens),
+                "groups": [group for _, group in groups],
+            }
+        )
+    return results, stats
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def analyze_corpus(
+    sentences: Iterable[list[tuple[str, str]]],
+    workers: int | None = None,
+    chunk_size: int = 256,
+    stats: CorpusStats | None = None,
+) -> Iterator[SentenceAnalysis]:
+    """Analyze tokenized sentences in chunks across a process pool.
+
+    Results are yielded in input order as chunks complete. Pass a
+    ``CorpusStats`` to have it updated with role frequencies, pattern hit
+    counts and unmatched POS n-grams while the stream is consumed. Workers
+    receive the already loaded grammar resources instead of re-reading them.
+    """
+    if stats is None:
+        stats = CorpusStats()
+    chunks = _chunks(sentences, chunk_size)
+    analyze = partial(_analyze_chunk, ngram=stats.ngram)
+
+    if workers == 1:
+        for results, chunk_stats in map(analyze, chunks):
+            stats.merge(chunk_stats)
+            yield from results
+        return
+
+    resources = get_resources().preload()
+    with multiprocessing.Pool(
+        workers, initializer=set_resources, initargs=(resources,)
+    ) as pool:
+        for results, chunk_stats in pool.imap(analyze, chunks):
+            stats.merge(chunk_stats)
+            yield from results
+
+
+if __name__ == "__main__":
+    tokens = [
+        ("학생", "NNG"),  # student
+        ("이", "JKS"),  # subject marker
+        ("학교", "NNG"),  # school
+        ("에", "JKB"),  # locative
+        ("가", "VV"),  # go
+        ("지", "EC"),  # connective
+        ("않", "VX"),  # negation
+        ("을", "EP"),  # pre-final ending
+        ("까요", "EF"),  # interrogative polite ending
+    ]
+
+    results = syntactic_grouping(tokens)
+    for match in results:
+        print(f"{match['role'].upper()} → {[form for form, _ in match['span']]}")
@@ -0,0 +1,214 @@
+import re
+
+HANGUL = re.compile(r"[가-힣]+")
+
+# Syllable = 0xAC00 + (initial * 21 + vowel) * 28 + final.
+VOWELS = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+FINALS = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+BRIGHT = "ㅏㅗㅑ"
+# Vowel-final stems merge with 아/어: 가+아 -> 가, 오+아 -> 와, 마시+어 -> 마셔...
+CONTRACTIONS = {
+    "ㅏ": "ㅏ",
+    "ㅐ": "ㅐ",
+    "ㅓ": "ㅓ",
+    "ㅔ": "ㅔ",
+    "ㅕ": "ㅕ",
+    "ㅗ": "ㅘ",
+    "ㅚ": "ㅙ",
+    "ㅜ": "ㅝ",
+    "ㅣ": "ㅕ",
+}
+
+# Particles as (after a consonant, after a vowel).
+PARTICLES = [
+    ("은", "는"),
+    ("이", "가"),
+    ("을", "를"),
+    ("과", "와"),
+    ("이랑", "랑"),
+    ("이나", "나"),
+    ("으로", "로"),
+    ("으로는", "로는"),
+    ("이에요", "예요"),
+    ("이야", "야"),
+    ("이고", "고"),
+    ("이지만", "지만"),
+    ("입니다", "입니다"),
+] + [
+    (particle, particle)
+    for particle in (
+        "에",
+        "에서",
+        "에게",
+        "에는",
+        "에도",
+        "에서는",
+        "에서도",
+        "한테",
+        "께서",
+        "도",
+        "만",
+        "까지",
+        "부터",
+        "의",
+        "처럼",
+        "같이",
+        "보다",
+        "마다",
+        "밖에",
+        "하고",
+    )
+]
+# Endings of the bare stem: 먹다, 먹고, 가지만...
+STEM_ENDINGS = [
+    "다",
+    "고",
+    "지",
+    "지만",
+    "게",
+    "는",
+    "는데",
+    "는지",
+    "던",
+    "도록",
+    "자",
+    "자마자",
+    "거나",
+    "겠다",
+    "겠어요",
+    "겠습니다",
+    "네요",
+    "지요",
+    "죠",
+]
+# Endings as (after a consonant, after a vowel). A leading ㄴ, ㄹ or ㅂ is
+# the final consonant of the last syllable: 가+ㅂ니다 -> 갑니다.
+STEM_PAIRED_ENDINGS = [
+    ("는다", "ㄴ다"),
+    ("습니다", "ㅂ니다"),
+    ("습니까", "ㅂ니까"),
+    ("은", "ㄴ"),
+    ("을", "ㄹ"),
+    ("을까요", "ㄹ까요"),
+    ("을게요", "ㄹ게요"),
+    ("으면", "면"),
+    ("으며", "며"),
+    ("으니", "니"),
+    ("으니까", "니까"),
+    ("으세요", "세요"),
+    ("으러", "러"),
+    ("으려고", "려고"),
+]
+# Endings of the 아/어 form (먹어요, 가서) and of the past (먹었다, 갔어요).
+INFINITIVE_ENDINGS = ["요", "서", "도", "야"]
+PAST_ENDINGS = ["다", "어", "어요", "고", "는데", "지만", "던", "습니다"]
+
+
+def split_syllable(syllable):
+    """(initial, vowel, final) indices of a Hangul syllable."""
+    index = ord(syllable) - 0xAC00
+    return index // 588, index % 588 // 28, index % 28
+
+
+def join_syllable(initial, vowel, final=0):
+    return chr(0xAC00 + (initial * 21 + vowel) * 28 + final)
+
+
+def final(word):
+    """Final consonant (a jamo, " " for none) of the last syllable of ``word``."""
+    return FINALS[split_syllable(word[-1])[2]]
+
+
+def with_final(word, jamo):
+    initial, vowel, _ = split_syllable(word[-1])
+    return word[:-1] + join_syllable(initial, vowel, FINALS.index(jamo))
+
+
+def attach(word, ending):
+    """``word`` + ``ending``, merging an ending that starts with a final jamo."""
+    if ending[0] in FINALS:
+        return with_final(word, ending[0]) + ending[1:]
+    return word + ending
+
+
+def infinitive(stem):
+    """The 아/어 form of a verb or adjective stem: 먹 -> 먹어, 가 -> 가, 하 -> 해.
+
+    Irregular stems (ㄷ, ㅂ, ㅅ, 르) are conjugated as if regular.
+    """
+    if stem.endswith("하"):
+        return stem[:-1] + "해"
+    initial, vowel, last = split_syllable(stem[-1])
+    bright = VOWELS[vowel] in BRIGHT
+    if last or VOWELS[vowel] not in CONTRACTIONS and VOWELS[vowel] != "ㅡ":
+        return stem + ("아" if bright else "어")
+    if VOWELS[vowel] == "ㅡ":
+        # 쓰 -> 써, but 바쁘 -> 바빠 after a bright syllable.
+        bright = len(stem) > 1 and VOWELS[split_syllable(stem[-2])[1]] in BRIGHT
+        contracted = "ㅏ" if bright else "ㅓ"
+    else:
+        contracted = CONTRACTIONS[VOWELS[vowel]]
+    return stem[:-1] + join_syllable(initial, VOWELS.index(contracted))
+
+
+def noun_forms(noun, plural=True):
+    """``noun`` alone and followed by a particle, optionally after 들.
+
+    >>> noun_forms("서울")[:4]
+    ['서울', '서울은', '서울이', '서울을']
+    >>> "사람들이" in noun_forms("사람")
+    True
+    """
+    after = 1 if final(noun) == " " else 0
+    forms = [noun]
+    for pair in PARTICLES:
+        particle = pair[after]
+        if particle.startswith("으로") and final(noun) == "ㄹ":
+            # 서울로, not 서울으로.
+            particle = particle[1:]
+        forms.append(noun + particle)
+    if plural:
+        forms += noun_forms(noun + "들", plural=False)
+    return forms
+
+
+def predicate_forms(stem):
+    """Common conjugations of a verb or adjective stem.
+
+    Only the endings listed above are produced, so that a short stem such
+    as 가 or 자 does not match 가슴 or 자기. One-syllable forms (잘, 간,
+    해...) are mostly other words and are left out.
+
+    >>> [form in predicate_forms("가") for form in ("갔어요", "갑니다", "가슴", "가만히")]
+    [True, True, False, False]
+    >>> [form in predicate_forms("자") for form in ("잤다", "자는", "자기", "자세히")]
+    [True, True, False, False]
+    >>> [form in predicate_forms("살") for form in ("사는", "삽니다", "살면", "살는")]
+    [True, True, True, False]
+    >>> [form in predicate_forms("먹") for form in ("먹었다", "먹으면", "먹먹히")]
+    [True, True, False]
+    """
+    last = final(stem)
+    # ㄹ is dropped before ㄴ, ㅂ and ㅅ: 살다 -> 사는, 삽니다, 사세요.
+    dropped = with_final(stem, " ") if last == "ㄹ" else stem
+    forms = [
+        (dropped if ending[0] in "는네" else stem) + ending
+        for ending in STEM_ENDINGS
+    ]
+    for consonant, vowel in STEM_PAIRED_ENDINGS:
+        if last == " ":
+            forms.append(attach(stem, vowel))
+        elif last == "ㄹ":
+            if vowel[0] in "ㄴㅂ세니":
+                forms.append(attach(dropped, vowel))
+            else:
+                forms.append(stem + vowel.lstrip("ㄹ"))
+        else:
+            forms.append(stem + consonant)
+    bare = infinitive(stem)
+    past = with_final(bare, "ㅆ")
+    if bare != stem:
+        forms.append(bare)
+    forms += [bare + ending for ending in INFINITIVE_ENDINGS]
+    forms += [past + ending for ending in PAST_ENDINGS]
+    return [form for form in dict.fromkeys(forms) if len(form) > 1]
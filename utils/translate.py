@@ -1,33 +1,36 @@
+import asyncio
+import aiohttp
 import requests
-from bs4 import BeautifulSoup
 import logging
 from googletrans import Translator
+from utils.cache import MISS, cached, get_cache
+from utils.dictionary import TokenBucket
+from utils.extract import (
+    parse_wiktionary,
+    parse_Glosbe,
+    parse_Daum,
+    parse_wordreference,
+)
 
 
-def translate_word_wiktionary(word: str) -> list[str]:
-    url = f"https://en.wiktionary.org/wiki/{word}"
+WIKTIONARY_URL = "https://en.wiktionary.org/wiki/{word}"
+GLOSBE_URL = "https://glosbe.com/{src}/{dest}/{word}"
+DAUM_URL = "https://dic.daum.net/search.do?q={word}"
+WORDREFERENCE_URL = "https://www.wordreference.com/koen/{word}"
+
 
+def fetch_page(url: str) -> str:
     response = requests.get(url)
     if response.status_code != 200:
         logging.warning("Failed to fetch page.")
         return None
-    soup = BeautifulSoup(response.text, "html.parser")
+    return response.text
 
-    page_content = soup.find("div", {"class": "mw-content-ltr mw-parser-output"})
-
-    if not page_content:
-        logging.warning("Could not find page content.")
-        return None
 
-    # headword_line = page_content.find("span", {"class": "headword-line"})
-    translations = []
-    ol = page_content.find("ol")
-    for li in ol.find_all("li"):
-        dl_tag = li.find("dl")
-        if dl_tag:
-            dl_tag.extract()
-        translations.append(li.text)
-    return translations
+@cached("wiktionary")
+def translate_word_wiktionary(word: str) -> list[str]:
+    text = fetch_page(WIKTIONARY_URL.format(word=word))
+    return parse_wiktionary(text) if text is not None else None
 
 
 # The MIT License (MIT)
@@ -52,76 +55,187 @@ def translate_word_wiktionary(word: str) -> list[str]:
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+@cached("googletrans")
 async def translate_word_googletrans(word: str, src: str, dest: str) -> str:
     async with Translator() as translator:
         result = await translator.translate(word, src=src, dest=dest)
     return result.text
 
 
+@cached("glosbe")
 def translate_word_Glosbe(word: str, src: str, dest: str) -> str:
-    url = f"https://glosbe.com/{src}/{dest}/{word}"
-    response = requests.get(url)
-    if response.status_code != 200:
-        logging.warning("Failed to fetch page.")
-        return None
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    page_content = soup.find("section", {"class": "bg-white px-1"})
-
-    if not page_content:
-        logging.warning("Could not find page content.")
-        return None
-
-    translations = []
-    ul_translation = page_content.find("ul", {"class": "pr-1"})
-
-    for li in ul_translation.find_all("li"):
-        h3 = li.find("h3")
-        translations.append(h3.text)
-    return translations
+    text = fetch_page(GLOSBE_URL.format(src=src, dest=dest, word=word))
+    return parse_Glosbe(text) if text is not None else None
 
 
+@cached("daum")
 def translate_word_Daum(word: str) -> list[str]:
-    url = f"https://dic.daum.net/search.do?q={word}"
-    response = requests.get(url)
-    if response.status_code != 200:
-        logging.warning("Failed to fetch page.")
-        return None
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    page_content = soup.find("div", {"class": "search_cont"})
-
-    if not page_content:
-        logging.warning("Could not find page content.")
-        return None
-
-    translations = []
-    table_translation = page_content.find_all("div", {"class": "card_word"})[1]
-    translation = table_translation.find("div", {"class": "search_type kuke_type"})
-
-    for li in translation.find_all("li"):
-        text_span = li.find("span", {"class": "txt_search"})
-        translations.append(text_span.text)
-    return translations
+    text = fetch_page(DAUM_URL.format(word=word))
+    return parse_Daum(text) if text is not None else None
 
 
+@cached("wordreference")
 def translate_word_wordreference(word: str) -> list[str]:
-    url = f"https://www.wordreference.com/koen/{word}"
-    response = requests.get(url)
-    if response.status_code != 200:
-        logging.warning("Failed to fetch page.")
-        return None
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    page_content = soup.find("td", {"id": "centercolumn"})
-
-    if not page_content:
-        logging.warning("Could not find page content.")
-        return None
-
-    translations = []
-    table_translation = page_content.find("table", {"class": "WRD"})
-
-    for td in table_translation.find_all("td", {"class": "FrWrd"})[1:]:
-        translations.append(td.text)
-    return translations
+    text = fetch_page(WORDREFERENCE_URL.format(word=word))
+    return parse_wordreference(text) if text is not None else None
+
+
+class Provider:
+    """Async translation provider with its own connection pool and limits.
+
+    ``url`` is a template over ``word``, ``src`` and ``dest`` (pointing it to
+    a local fixture server makes the provider testable) and ``parser`` turns
+    the page into a list of candidates. ``params`` lists which of src/dest
+    are part of the cache key, matching the sync ``translate_word_*``.
+    """
+
+    def __init__(
+        self,
+        name,
+        url,
+        parser,
+        params=(),
+        rate=2.0,
+        concurrency=4,
+        timeout=10,
+    ):
+        self.name = name
+        self.url = url
+        self.parser = parser
+        self.params = params
+        self.limiter = TokenBucket(rate, concurrency)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def fetch(self, word, src, dest):
+        await self.limiter.acquire()
+        async with self.session.get(
+            self.url.format(word=word, src=src, dest=dest)
+        ) as response:
+            if response.status != 200:
+                logging.warning(f"{self.name}: failed to fetch page.")
+                return None
+            return self.parser(await response.text())
+
+    async def translate(self, word, src="ko", dest="en"):
+        cache = get_cache()
+        params = {
+            key: value
+            for key, value in (("src", src), ("dest", dest))
+            if key in self.params
+        }
+        candidates = cache.get(self.name, word, params)
+        if candidates is MISS:
+            if cache.offline:
+                return None
+            try:
+                candidates = await self.fetch(word, src, dest)
+            except Exception as e:
+                logging.warning(f"{self.name}: {word} failed: {e}")
+                return None
+            if candidates is not None:
+                cache.set(self.name, word, candidates, params)
+        # googletrans answers with a single string.
+        return [candidates] if isinstance(candidates, str) else candidates
+
+
+class GoogletransProvider(Provider):
+    def __init__(self, name="googletrans", rate=2.0, concurrency=4, timeout=10):
+        super().__init__(name, None, None, ("src", "dest"), rate, concurrency, timeout)
+        self.translator = None
+
+    async def __aenter__(self):
+        # One Translator, hence one HTTP client and connection pool, per
+        # provider like the aiohttp session of Provider.
+        self.translator = await Translator().__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.translator.__aexit__(*exc)
+
+    async def fetch(self, word, src, dest):
+        await self.limiter.acquire()
+        result = await asyncio.wait_for(
+            self.translator.translate(word, src=src, dest=dest), self.timeout
+        )
+        return result.text
+
+
+def default_providers():
+    return [
+        Provider("wiktionary", WIKTIONARY_URL, parse_wiktionary),
+        Provider("glosbe", GLOSBE_URL, parse_Glosbe, ("src", "dest")),
+        Provider("daum", DAUM_URL, parse_Daum),
+        Provider("wordreference", WORDREFERENCE_URL, parse_wordreference),
+        GoogletransProvider(),
+    ]
+
+
+async def translate_many(words, providers=None, src="ko", dest="en", first_good=False):
+    """Translate ``words`` with every provider concurrently.
+
+    Yields ``(word, provider_name, candidates)`` as results arrive;
+    ``candidates`` is None when a provider failed. With ``first_good``, the
+    remaining lookups of a word are cancelled as soon as one provider
+    returns candidates for it, and only that answer is yielded.
+    """
+    providers = providers if providers is not None else default_providers()
+    tasks = {}
+    answered = set()
+    for provider in providers:
+        await provider.__aenter__()
+    try:
+
+        async def lookup(word, provider):
+            return word, provider.name, await provider.translate(word, src, dest)
+
+        for word in dict.fromkeys(words):
+            tasks[word] = [
+                asyncio.create_task(lookup(word, provider)) for provider in providers
+            ]
+        pending = [task for word_tasks in tasks.values() for task in word_tasks]
+
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.cancelled():
+                    continue
+                word, name, candidates = task.result()
+                # Lookups finishing in the same batch as the first answer
+                # were too late to be cancelled.
+                if word in answered:
+                    continue
+                yield word, name, candidates
+                if first_good and candidates:
+                    answered.add(word)
+                    for other in tasks[word]:
+                        other.cancel()
+    finally:
+        for word_tasks in tasks.values():
+            for task in word_tasks:
+                task.cancel()
+        for provider in providers:
+            await provider.__aexit__(None, None, None)
+
+
+async def translate_all(words, providers=None, src="ko", dest="en", first_good=False):
+    """Collect ``translate_many`` into {word: {provider_name: candidates}}."""
+    merged = {}
+    async for word, name, candidates in translate_many(
+        words, providers, src, dest, first_good
+    ):
+        merged.setdefault(word, {})[name] = candidates
+    return merged